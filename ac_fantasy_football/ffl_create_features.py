@@ -1,5 +1,8 @@
 import numpy as np
 import pandas as pd
+import hashlib
+import json
+import os
 import ffl_data_importing as fdi
 
 # Import values
@@ -7,6 +10,7 @@ weeks = fdi.valid_sheet_names
 positions = fdi.positions
 teams = fdi.teams
 na_val = fdi.na_val
+file_path_dict = fdi.file_path_dict
 
 # Standard Globals
 stats_w_opp_dict = {'QB': ['FPTS', 'PATD', 'PAYDS', 'RUTD', 'RUYDS'], 
@@ -17,6 +21,9 @@ stats_wo_opp_dict = {'QB': ['RUSH %', 'TOUCH %'],
                     'RB': ['SNAP %', 'RUSH %', 'TGT %'], 
                     'WR': ['SNAP %', 'TOUCH %', 'TGT %'],
                     'TE': ['SNAP %', 'TOUCH %', 'TGT %']}
+model_id_columns = ['PLAYER', 'TEAM', 'POS', 'WEEK', 'OPPONENT', 'FPTS']
+model_source_files = ['player_data_by_week', 'utilization_data', 'players_out_by_week']  # Workbooks read by import_player_with_util_data
+feature_version = 2 # Bump when a change to the feature functions alters their output
 
 # Utility Functions
 def process_result_weeks(result_weeks, include_result_week):
@@ -55,85 +62,197 @@ def process_result_weeks(result_weeks, include_result_week):
                 result_weeks[index] = weeks[(weeks.index(week) - 1)]
     return result_weeks
 
+def get_span_weeks(span):
+    '''
+    Converts a span input to add_retro_data into a number of weeks. Returns int, or None for all previous weeks.
+    
+    Args:
+        span (str): 'ALL' for all previous weeks, or 'L' followed by a number of weeks like 'L3'
+        
+    Returns:
+        int or None: number of weeks in the span
+    '''
+    span = span.upper()
+    if span == 'ALL':
+        return None
+    assert (span[:1] == 'L') & span[1:].isdigit() & (span[1:] != '0')
+    return int(span[1:])
+def get_window_bounds(result_week, span_weeks, include_result_week):
+    '''
+    Returns the (start, end) positions in weeks of the retro window for result_week, end is exclusive.
+    
+    Args:
+        result_week (str): week the retro data is calculated for
+        span_weeks (int or None): number of weeks in the window, None for all previous weeks
+        include_result_week (bool): include the result week in the window
+        
+    Returns:
+        tuple: (start, end)
+    '''
+    global weeks
+    end = weeks.index(result_week)
+    if include_result_week:
+        end += 1
+    start = 0
+    if span_weeks is not None:
+        start = max(0, end - span_weeks)
+    return (start, end)
+def get_trailing_totals(matrix, result_weeks, span_weeks, include_result_week):
+    '''
+    Sums each row of a matrix with one column per week over the retro window of every result week, one column slice per
+    result week for all rows at once. Returns dataframe with the same index as matrix and one column per result week.
+    
+    Args:
+        matrix (pd.DataFrame): values with one column per week
+        result_weeks (list): weeks to calculate totals for
+        span_weeks (int or None): number of weeks in the window, None for all previous weeks
+        include_result_week (bool): include the result week in the window
+        
+    Returns:
+        pd.DataFrame: window totals, one column per result week
+    '''
+    global weeks
+    values = matrix.reindex(columns=weeks).fillna(0).to_numpy(dtype=float)
+
+    # Summing the window in week order, not differencing a prefix sum, adds the values like a sum over the player's rows
+    totals = {}
+    for result_week in result_weeks:
+        start, end = get_window_bounds(result_week, span_weeks, include_result_week)
+        totals[result_week] = values[:, start:end].sum(axis=1)
+    return pd.DataFrame(totals, index=matrix.index)
+def get_played_weeks(dnp, result_weeks, span_weeks, include_result_week):
+    '''
+    Counts the weeks in the retro window of every result week that a player was not out or on bye, the denominator of 
+    retro averages. Windows without a played week are NaN. Returns dataframe with one column per result week.
+    
+    Args:
+        dnp (pd.DataFrame): bool player x week matrix, True where the player was out or on bye
+        result_weeks (list): weeks to count played weeks for
+        span_weeks (int or None): number of weeks in the window, None for all previous weeks
+        include_result_week (bool): include the result week in the window
+        
+    Returns:
+        pd.DataFrame: played weeks, one column per result week
+    '''
+    dnp_totals = get_trailing_totals(dnp, result_weeks, span_weeks, include_result_week)
+    played = {}
+    for result_week in result_weeks:
+        start, end = get_window_bounds(result_week, span_weeks, include_result_week)
+        played[result_week] = (end - start) - dnp_totals[result_week]
+    played = pd.DataFrame(played, index=dnp.index)
+    return played.where(played != 0)
+
 # Functions for creating predictive model features
-def add_retro_data(df_to_add_to, ref_data=False, stat='FPTS', w_opp_data=False, span='L3', include_result_week=False, type='AVG', result_weeks=False):
+def add_retro_data(df_to_add_to, ref_data=False, stat='FPTS', w_opp_data=False, span='L3', include_result_week=False, type='AVG', result_weeks=False, status_index=None, opp_cube=None):
     '''
     df_to_add_to is the dataframe to add columns to, ref_data is the reference dataframe to pull data from.
     Adds columns for stat average by player for previous weeks or last 3 weeks, and stat average 
     sum by player's position against this opponent (Ex: stat is points, player is a WR against NYG, we add the average total 
     points scored against NYG by WRs). Returns dataframe with additional columns. w_opp_data is a boolean determining if 
-    the opponent information is also added. span is either 'L3' for last three weeks or 'ALL' for all previous weeks (process
-    intensive). For average, weeks in which a player does not play (out or on bye) are not counted in the denominator.
-    include_result_week is a boolean determining if "this weeks" resulting stat is included in the average. 
-    result_weeks can be set to a string or list of result weeks to calculate retro data before. Use with include_result_week 
+    the opponent information is also added. span is 'L3' for last three weeks (or 'L' with any number of weeks, like 'L5') 
+    or 'ALL' for all previous weeks. For average, weeks in which a player does not play (out or on bye) are not counted in 
+    the denominator. include_result_week is a boolean determining if "this weeks" resulting stat is included in the average. 
+    result_weeks can be set to a string or list of result weeks to calculate retro data before. Use with include_result_week.
+    Runs add_retro_features with a single feature spec.
 
     Args:
         df_to_add_to (pd.DataFrame): dataframe to add columns to
         ref_data (bool or pd.DataFrame, optional): if included, dataframe to pull retro data from. Default: False
         stat (str, optional): column in data to calculate retro data for. Default: 'FPTS'
-        w_opp_data (bool, optional): include calculation of data against opponent. More performance intensive. Default: False
-        span (str, optional): 'L3' or 'ALL', calculate data over the previous 3 weeks or all previous weeks. Default: 'L3'
+        w_opp_data (bool, optional): include calculation of data against opponent. Default: False
+        span (str, optional): 'L3', 'ALL' or 'L' with a number of weeks, calculate data over the previous 3 weeks, all previous weeks or 
+            the previous number of weeks. Default: 'L3'
         include_result_week (bool, optional): include this weeks result in the calculation. False more useful for predictive modeling. Default: False
         type (str, optional): 'AVG' or 'SUM', type of calculation to return. Default: 'AVG
         result_weeks (bool, str, or list, optional): if included, result weeks to calculate data for. Default: False
+        status_index (pd.DataFrame, optional): output of fdi.import_player_status_index, loaded if not included. Default: None
+        opp_cube (fdi.OppStatCube, optional): opponent cube of ref_data including stat over weeks, built if not included. Default: None
 
     Returns:
         pd.DataFrame: dataframe with added columns
     
 
     '''
+    feature_specs = [(stat, span, type, w_opp_data)]
+    df_to_add_to = add_retro_features(df_to_add_to, ref_data, feature_specs, include_result_week, result_weeks, status_index, opp_cube)
+    return df_to_add_to
+def add_retro_features(df_to_add_to, ref_data, feature_specs, include_result_week=False, result_weeks=False, status_index=None, opp_cube=None):
+    '''
+    Batch version of add_retro_data, adds the retro columns for every (stat, span, type, w_opp_data) spec in feature_specs. 
+    The stats are pivoted to player x week matrices and summed into one opponent cube up front, so each spec costs a
+    window sum over a matrix rather than another pass over ref_data. Columns are named and filled like add_retro_data, in 
+    the order of feature_specs. Returns dataframe with additional columns.
+
+    Args:
+        df_to_add_to (pd.DataFrame): dataframe to add columns to
+        ref_data (bool or pd.DataFrame): dataframe to pull retro data from, if False df_to_add_to is used
+        feature_specs (list): list of (stat, span, type, w_opp_data) tuples like ('FPTS', 'L3', 'AVG', True), see add_retro_data
+        include_result_week (bool, optional): include this weeks result in the calculation. Default: False
+        result_weeks (bool, str, or list, optional): if included, result weeks to calculate data for. Default: False
+        status_index (pd.DataFrame, optional): output of fdi.import_player_status_index, loaded if not included. Default: None
+        opp_cube (fdi.OppStatCube, optional): opponent cube of ref_data including every stat with w_opp_data over weeks, built if not included. Default: None
+
+    Returns:
+        pd.DataFrame: dataframe with added columns
+    '''
+    global weeks
     if isinstance(ref_data, bool):
         ref_data = df_to_add_to.copy()
-    assert (span.upper() == 'L3')|(span.upper() == 'ALL') 
-    global weeks
-    if w_opp_data:
-        cache = {} # creating a cache for retro opponent data
+    if status_index is None:
+        status_index = fdi.import_player_status_index('all_valid', file_path_dict)
     
     result_weeks = process_result_weeks(result_weeks, include_result_week)
+    if isinstance(result_weeks, str):
+        result_weeks = [result_weeks]
 
-    for result_week in result_weeks:
-        prev_weeks = []
-        for week in weeks:
-            if week == result_week:
-                if include_result_week:
-                   prev_weeks.append(week) 
-                break
-            prev_weeks.append(week)
-        # Do nothing if span is 'ALL'
-        if span.upper() == 'L3':
-            if len(prev_weeks) > 3:
-                prev_weeks = prev_weeks[(len(prev_weeks)-3):]
-            
-        rel_ref_data = ref_data[ref_data['WEEK'] == result_week]
-        retro_data = ref_data[ref_data['WEEK'].isin(prev_weeks)]
-        
-        # Do this for every player with a value where week is result_week
-        for index, row in rel_ref_data.iterrows():
-            opp =  row['OPPONENT']
-            if opp == 'BYE WEEK': 
-                continue    # We don't care about predicting values for players on BYE
-            player = row['PLAYER']
-            pos = row['POS']
-            player_avg_prev = get_player_avg(retro_data, player, stat, prev_weeks, type)
-            df_to_add_to.loc[index, (type.upper()+span.upper()+"_"+stat.upper())] = player_avg_prev
-            if w_opp_data:
-                # Key order for cache: result_week, opp, pos
-                if result_week in cache.keys():
-                    if opp in cache[result_week].keys():
-                        if pos in cache[result_week][opp].keys():
-                            opp_avg_prev = cache[result_week][opp][pos]
-                        else:
-                            opp_avg_prev = get_pos_sum_avg_v_opp(retro_data, pos, opp, stat, type)
-                            cache[result_week][opp][pos] = opp_avg_prev
-                    else:
-                        opp_avg_prev = get_pos_sum_avg_v_opp(retro_data, pos, opp, stat, type)
-                        cache[result_week][opp] = {pos: opp_avg_prev}
+    # Rows to fill, we don't care about predicting values for players on BYE
+    rows = ref_data[ref_data['WEEK'].isin(result_weeks) & (ref_data['OPPONENT'] != 'BYE WEEK')]
+    rows = rows[rows.index.isin(df_to_add_to.index)]
+    row_weeks = rows['WEEK'].astype(object).to_numpy()
+    row_opps = rows['OPPONENT'].astype(object).to_numpy()
+    row_positions = rows['POS'].astype(object).to_numpy()
+    player_keys = pd.MultiIndex.from_arrays([rows['PLAYER'].astype(object).to_numpy(), row_weeks])
+
+    # Shared player x week matrices of every stat, weeks the status file lists a player out or on bye are taken out of the denominator
+    player_stats = fdi.unique([spec[0] for spec in feature_specs])
+    player_weekly = ref_data.groupby([ref_data['PLAYER'].astype(object), ref_data['WEEK'].astype(object)])[player_stats].sum().unstack('WEEK')
+    dnp = (status_index['OUT'] | status_index['BYE']).reindex(index=player_weekly.index, columns=weeks, fill_value=False)
+    played_weeks = {}   # {span_weeks: weeks played in each window}
+
+    # Shared opponent x position x week sums of every stat across players
+    opp_stats = fdi.unique([spec[0] for spec in feature_specs if spec[3]])
+    if opp_stats and (opp_cube is None):
+        opp_cube = fdi.OppStatCube(ref_data, opp_stats, weeks)
+
+    for stat, span, type, w_opp_data in feature_specs:
+        span_weeks = get_span_weeks(span)
+        type = type.upper()
+        assert (type == 'AVG')|(type == 'SUM')
+
+        player_totals = get_trailing_totals(player_weekly[stat], result_weeks, span_weeks, include_result_week)
+        if type == 'SUM':
+            player_values = player_totals
+        else:
+            if span_weeks not in played_weeks:
+                played_weeks[span_weeks] = get_played_weeks(dnp, result_weeks, span_weeks, include_result_week)
+            player_values = (player_totals / played_weeks[span_weeks]).fillna(0)
+        player_values = np.round(player_values.stack())
+        df_to_add_to.loc[rows.index, (type+span.upper()+"_"+stat.upper())] = player_values.reindex(player_keys).to_numpy()
+
+        if w_opp_data:
+            # Averages are over the weeks with data
+            opp_values = np.full(len(rows), np.nan)
+            for result_week in result_weeks:
+                start, end = get_window_bounds(result_week, span_weeks, include_result_week)
+                if type == 'SUM':
+                    window_values = opp_cube.window_totals(start, end, stat)
                 else:
-                    opp_avg_prev = get_pos_sum_avg_v_opp(retro_data, pos, opp, stat, type)
-                    cache[result_week] = {opp: {pos: opp_avg_prev}}       
-                
-                opp_avg_prev = get_pos_sum_avg_v_opp(retro_data, pos, opp, stat, type)
-                df_to_add_to.loc[index, ('OPP'+type.upper()+span.upper()+"_"+stat.upper())] = opp_avg_prev
+                    window_values = opp_cube.window_average(start, end, stat)
+                in_week = row_weeks == result_week
+                opp_values[in_week] = opp_cube.lookup(window_values, row_opps[in_week], row_positions[in_week])
+            if type == 'SUM':
+                opp_values = np.nan_to_num(opp_values)
+            df_to_add_to.loc[rows.index, ('OPP'+type+span.upper()+"_"+stat.upper())] = np.round(opp_values, 2)
                     
     return df_to_add_to
 def get_pos_sum_avg_v_opp(retro_data, position, opponent, stat, type):
@@ -155,16 +274,14 @@ def get_pos_sum_avg_v_opp(retro_data, position, opponent, stat, type):
     assert position in positions
     assert opponent in teams
     assert stat in retro_data.columns
-    if not(isinstance(retro_data[stat], float)):
-        retro_data.loc[:,stat] = retro_data.loc[:,stat].astype(float)
     rel_subset = retro_data[(retro_data['POS'] == position) & (retro_data['OPPONENT'] == opponent)]
-    summary = rel_subset.groupby(by='WEEK')[stat].sum()
+    summary = rel_subset.groupby(by='WEEK', observed=True)[stat].sum()
     if type == 'AVG':
         value = summary.mean()
     else:
         value = summary.sum()
     return np.round(value, 2)
-def get_player_avg(retro_data, player, stat, weeks, type):
+def get_player_avg(retro_data, player, stat, weeks, type, status_index=None):
     '''
     Calculate the average of a stat (FPTS, PATD, RUYDS, etc.) for a player, factoring out weeks the player
     was out injured or on bye. Assumes non-relevant data is filtered out of retro_data (weeks that would 
@@ -174,72 +291,365 @@ def get_player_avg(retro_data, player, stat, weeks, type):
         retro_data (pd.DataFrame): dataframe containing previous weeks data
         player (str): player to calculate stat for
         stat (str): stat to calculate
-        weeks (str): weeks to calculate stat for
+        weeks (list): weeks to calculate stat for
         type (str): 'AVG' or 'SUM', what to calculate
+        status_index (pd.DataFrame, optional): output of fdi.import_player_status_index, loaded if not included. Default: None
         
     Returns:
         float: calculation of previous stat for position against opponent 
     '''
     assert stat in retro_data.columns
-    if not(isinstance(retro_data[stat], float)):
-        retro_data.loc[:,stat] = retro_data.loc[:,stat].astype(float)
     rel_subset = retro_data[retro_data['PLAYER'] == player]
-    #rel_subset.loc[:,stat] = rel_subset.loc[:,stat].astype(float)
-    player_status = fdi.import_player_status(weeks)
-    try: 
-        player_status = player_status[player_status['PLAYER'] == player]
-    except:
-        raise ValueError(f'Error when player = {player}, weeks = {weeks}')
-
-    # If player is listed in player status (was out), remove those weeks from denominator
+
+    # If player is listed as out or on bye, remove those weeks from denominator
     if type == 'SUM':
         value = rel_subset[stat].sum()
     else:
-        if player_status.empty:
-            num = rel_subset[stat].sum()
-            denom = len(weeks)
+        if status_index is None:
+            status_index = fdi.import_player_status_index('all_valid', file_path_dict)
+        num = rel_subset[stat].sum()
+        if player in status_index.index:
+            player_status = status_index.loc[player]
+            denom = len(weeks) - (player_status['OUT'][weeks] | player_status['BYE'][weeks]).sum()
         else:
-            num = rel_subset[stat].sum()
-            denom = len(weeks) - player_status['WEEK'].nunique()
+            denom = len(weeks)
         
         if denom != 0:
             value = num / denom
         else:
             value = 0
     return np.round(value)
-def import_model_data(pos):
+def get_feature_specs(pos):
     '''
-    Import data set with engineered retro features for a specific position (pos). Features vary by position.
-    Returns dataframe.
-
+    Returns the (stat, span, type, w_opp_data) feature specs used in the model data of a position, see add_retro_features.
+    
     Args:
-        pos (str): position to import model data for
+        pos (str): position to return feature specs for
         
     Returns:
-        pd.DataFrame: model data     
+        list: feature specs
     '''
     global stats_w_opp_dict
     global stats_wo_opp_dict
-    global positions
-    
-    assert pos in positions
 
-    print('Importing player data...')
-    player_stats = fdi.import_player_with_util_data('all_valid')
+    feature_specs = []
+    for stat in stats_w_opp_dict[pos]:
+        feature_specs.append((stat, 'L3', 'AVG', True))
+    for stat in stats_wo_opp_dict[pos]:
+        feature_specs.append((stat, 'L3', 'AVG', False))
+    return feature_specs
+def build_model_data(pos, player_stats, status_index, feature_specs, result_weeks=False):
+    '''
+    Builds the model data of a position from imported player data. Retro windows always reach back into all of 
+    player_stats, result_weeks only limits the rows returned. Returns dataframe.
+
+    Args:
+        pos (str): position to build model data for
+        player_stats (pd.DataFrame): output of fdi.import_player_with_util_data
+        status_index (pd.DataFrame): output of fdi.import_player_status_index for player_stats
+        feature_specs (list): output of get_feature_specs
+        result_weeks (bool or list, optional): if included, weeks to return rows for. Default: False, every week after WK1
+
+    Returns:
+        pd.DataFrame: model data
+    '''
+    global weeks
+
+    if isinstance(result_weeks, bool):
+        result_weeks = weeks[1:]
     ref_data = player_stats[player_stats['POS'] == pos]
-    model_data = ref_data.loc[(ref_data['WEEK'] != 'WK1'), ['PLAYER', 'TEAM', 'POS', 'WEEK', 'OPPONENT', 'FPTS']]
-    stats_to_add_w_opp = stats_w_opp_dict[pos]
-    stats_to_add_wo_opp = stats_wo_opp_dict[pos]
-
-    for stat in stats_to_add_w_opp:
-        print(f'Adding {stat} retro data...')
-        model_data = add_retro_data(model_data, ref_data, stat, w_opp_data=True, span='L3')
-    for stat in stats_to_add_wo_opp:
-        print(f'Adding {stat} retro data...')
-        model_data = add_retro_data(model_data, ref_data, stat, w_opp_data=False, span='L3')
+    model_data = ref_data.loc[ref_data['WEEK'].isin(result_weeks), model_id_columns]
+    model_data = add_retro_features(model_data, ref_data, feature_specs, status_index=status_index)
     # Drop off players without FPTS data
     model_data = model_data.dropna(subset=['FPTS'])
     # Add FPTS_CLASS to be used as a target variable
-    model_data = add_FPTS_CLASS(model_data)
+    model_data = fdi.add_FPTS_CLASS(model_data)
+    return model_data
+def build_future_model_data(pos, player_stats, status_index, feature_specs, future_weeks=False, players=False):
+    '''
+    Builds model rows of a position for weeks that have not been played yet, one row per player and future week against 
+    the opponent on the NFL schedule. The retro windows end with the latest valid week, so player features are the same 
+    for every future week while opponent features follow the schedule. Rows on bye are left out. Columns match 
+    build_model_data without the FPTS and FPTS_CLASS results. Returns dataframe.
+
+    Args:
+        pos (str): position to build rows for
+        player_stats (pd.DataFrame): output of fdi.import_player_with_util_data
+        status_index (pd.DataFrame): output of fdi.import_player_status_index for player_stats
+        feature_specs (list): output of get_feature_specs
+        future_weeks (bool or list, optional): if included, weeks to build rows for. Default: False, fdi.future_weeks
+        players (bool or list, optional): if included, players to build rows for. Default: False, every player of pos
+
+    Returns:
+        pd.DataFrame: model rows for future weeks
+    '''
+    global weeks
+
+    if isinstance(future_weeks, bool):
+        future_weeks = fdi.future_weeks
+    ref_data = player_stats[player_stats['POS'] == pos]
+
+    # Player x future week rows with the team each player had most recently
+    latest = fdi.get_latest_team_pos(ref_data)
+    latest = latest[latest['POS'] == pos]
+    if not(isinstance(players, bool)):
+        latest = latest[latest.index.isin(players)]
+    future_data = pd.DataFrame({'PLAYER': np.repeat(latest.index.to_numpy(), len(future_weeks)),
+                                'TEAM': np.repeat(latest['TEAM'].to_numpy(), len(future_weeks)),
+                                'POS': pos,
+                                'WEEK': np.tile(future_weeks, len(latest))})
+    schedule = fdi.import_nfl_schedule(file_path_dict).stack()
+    future_data['OPPONENT'] = schedule.reindex(pd.MultiIndex.from_arrays([future_data['TEAM'], future_data['WEEK']])).to_numpy()
+    future_data = future_data[future_data['OPPONENT'].notna() & (future_data['OPPONENT'] != 'BYE')].reset_index(drop=True)
+
+    # Windows of the latest valid week including it, every future week is predicted from the same weeks
+    last_week = weeks[-1]
+    row_players = future_data['PLAYER'].to_numpy()
+    player_stat_names = fdi.unique([spec[0] for spec in feature_specs])
+    player_weekly = ref_data.groupby([ref_data['PLAYER'].astype(object), ref_data['WEEK'].astype(object)])[player_stat_names].sum().unstack('WEEK')
+    dnp = (status_index['OUT'] | status_index['BYE']).reindex(index=player_weekly.index, columns=weeks, fill_value=False)
+    opp_stats = fdi.unique([spec[0] for spec in feature_specs if spec[3]])
+    if opp_stats:
+        opp_cube = fdi.OppStatCube(ref_data, opp_stats, weeks)
+
+    for stat, span, type, w_opp_data in feature_specs:
+        span_weeks = get_span_weeks(span)
+        type = type.upper()
+        player_values = get_trailing_totals(player_weekly[stat], [last_week], span_weeks, True)[last_week]
+        if type == 'AVG':
+            player_values = (player_values / get_played_weeks(dnp, [last_week], span_weeks, True)[last_week]).fillna(0)
+        future_data[type+span.upper()+"_"+stat.upper()] = np.round(player_values.reindex(row_players).to_numpy())
+
+        if w_opp_data:
+            start, end = get_window_bounds(last_week, span_weeks, True)
+            if type == 'SUM':
+                window_values = opp_cube.window_totals(start, end, stat)
+            else:
+                window_values = opp_cube.window_average(start, end, stat)
+            opp_values = opp_cube.lookup(window_values, future_data['OPPONENT'].to_numpy(), future_data['POS'].to_numpy())
+            if type == 'SUM':
+                opp_values = np.nan_to_num(opp_values)
+            future_data['OPP'+type+span.upper()+"_"+stat.upper()] = np.round(opp_values, 2)
+    
+    for column in ['PLAYER', 'TEAM', 'POS', 'WEEK', 'OPPONENT']:
+        future_data[column] = future_data[column].astype('category')
+    return future_data
+def sort_model_data(model_data):
+    '''
+    Puts model data in the row order of fdi.import_player_with_util_data, by player then week, so the rows line up the 
+    same whether they were built at once or read back from the feature store. Returns dataframe with a new index.
+
+    Args:
+        model_data (pd.DataFrame): model data
+
+    Returns:
+        pd.DataFrame: sorted model data
+    '''
+    keys = model_data[['PLAYER', 'POS', 'WEEK', 'TEAM']].astype(str)
+    order = keys.sort_values(by=['PLAYER', 'POS', 'WEEK', 'TEAM'], kind='stable').index
+    model_data = model_data.loc[order].reset_index(drop=True)
+    for column in ['PLAYER', 'TEAM', 'POS', 'WEEK', 'OPPONENT']:
+        model_data[column] = model_data[column].astype('category')
+    return model_data
+
+# Feature store
+def get_feature_store_dir(pos, feature_specs, use_store=True):
+    '''
+    Returns the feature store directory of a position and feature spec, creating it if needed. Each set of feature specs 
+    gets its own directory, so changing the features never reads rows built for the old ones. Returns False if the store 
+    is turned off, no store directory is listed or the Parquet engine (pyarrow) is not installed.
+
+    Args:
+        pos (str): position of the model data
+        feature_specs (list): output of get_feature_specs
+        use_store (bool, optional): set to False to turn off the store. Default: True
+
+    Returns:
+        str or bool: store directory or False
+    '''
+    global feature_version
+    if not(use_store) or (fdi.pyarrow is None) or ('feature_store' not in file_path_dict):
+        return False
+    spec_key = json.dumps([feature_version, fdi.store_version, feature_specs])
+    spec_key = hashlib.sha1(spec_key.encode()).hexdigest()[:16]
+    store_dir = os.path.join(file_path_dict['feature_store'], pos.replace('/', ''), spec_key)
+    os.makedirs(store_dir, exist_ok=True)
+    return store_dir
+def get_feature_fingerprints(feature_specs, result_weeks):
+    '''
+    Returns a fingerprint of the source sheets behind each result week of the model data, the result week itself and 
+    every week in its retro windows. A new week only changes its own fingerprint, an edited week also changes the 
+    fingerprints of the later weeks whose windows reach back to it.
+
+    Args:
+        feature_specs (list): output of get_feature_specs
+        result_weeks (list): weeks to fingerprint
+
+    Returns:
+        dict: {result_week: fingerprint}
+    '''
+    global weeks
+    global model_source_files
+
+    fingerprints = {}
+    for result_week in result_weeks:
+        window_weeks = {result_week}
+        for stat, span, type, w_opp_data in feature_specs:
+            start, end = get_window_bounds(result_week, get_span_weeks(span), False)
+            window_weeks.update(weeks[start:end])
+        window_weeks = [week for week in weeks if week in window_weeks]
+        fingerprints[result_week] = fdi.get_season_fingerprint(file_path_dict, model_source_files, window_weeks)
+    return fingerprints
+def read_feature_manifest(store_dir):
+    '''
+    Read the feature store manifest, which lists the fingerprint each stored result week was built from. Returns dictionary.
+
+    Args:
+        store_dir (str): feature store directory
+
+    Returns:
+        dict: {result_week: fingerprint}
+    '''
+    manifest_file = os.path.join(store_dir, 'manifest.json')
+    if not(os.path.exists(manifest_file)):
+        return {}
+    with open(manifest_file) as file:
+        return json.load(file)
+def write_feature_manifest(store_dir, manifest):
+    '''
+    Write the feature store manifest.
+
+    Args:
+        store_dir (str): feature store directory
+        manifest (dict): {result_week: fingerprint}
+    '''
+    manifest_file = os.path.join(store_dir, 'manifest.json')
+    # Write to a temporary file first so a failed write never leaves a partial manifest
+    with open(manifest_file + '.tmp', 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(manifest_file + '.tmp', manifest_file)
+def get_stale_weeks(store_dir, fingerprints):
+    '''
+    Returns the result weeks in fingerprints without stored rows in the feature store, or whose fingerprint changed 
+    since they were stored. Returns list.
+
+    Args:
+        store_dir (str): feature store directory
+        fingerprints (dict): output of get_feature_fingerprints
+
+    Returns:
+        list: result weeks to build
+    '''
+    manifest = read_feature_manifest(store_dir)
+    stale_weeks = []
+    for week, fingerprint in fingerprints.items():
+        if (manifest.get(week) != fingerprint) or not(os.path.exists(os.path.join(store_dir, f'{week}.parquet'))):
+            stale_weeks.append(week)
+    return stale_weeks
+def write_model_data(store_dir, model_data, fingerprints):
+    '''
+    Write the model data of each result week in fingerprints to its partition in the feature store and record the 
+    fingerprints in the manifest.
+
+    Args:
+        store_dir (str): feature store directory
+        model_data (pd.DataFrame): output of build_model_data
+        fingerprints (dict): {result_week: fingerprint} of the weeks in model_data
+    '''
+    manifest = read_feature_manifest(store_dir)
+    for week, fingerprint in fingerprints.items():
+        model_data[model_data['WEEK'] == week].reset_index(drop=True).to_parquet(os.path.join(store_dir, f'{week}.parquet'))
+        manifest[week] = fingerprint
+    write_feature_manifest(store_dir, manifest)
+def read_model_data(store_dir, result_weeks):
+    '''
+    Read the stored model data of the weeks in result_weeks from the feature store. Returns dataframe.
+
+    Args:
+        store_dir (str): feature store directory
+        result_weeks (list): weeks to read
+
+    Returns:
+        pd.DataFrame: model data
+    '''
+    partitions = [pd.read_parquet(os.path.join(store_dir, f'{week}.parquet')) for week in result_weeks]
+    return sort_model_data(pd.concat(partitions, ignore_index=True))
+def import_model_data(pos, use_store=True):
+    '''
+    Import data set with engineered retro features for a specific position (pos). Features vary by position.
+    Rows are kept in the feature store by result week, only weeks without stored rows or whose source sheets changed 
+    since they were stored (including weeks in their retro windows) are built again. Returns dataframe.
+
+    Args:
+        pos (str): position to import model data for
+        use_store (bool, optional): reuse model data from the feature store. Default: True
+        
+    Returns:
+        pd.DataFrame: model data     
+    '''
+    return import_all_model_data([pos], use_store=use_store)[pos]
+def import_all_model_data(pos_list=False, use_store=True, workers=1):
+    '''
+    Import the model data of several positions at once, see import_model_data. The season data is imported once for all 
+    positions, and only if a position has weeks to build. With workers > 1 the positions are built in parallel processes.
+    Returns dictionary.
+
+    Args:
+        pos_list (bool or list, optional): positions to import model data for. Default: False, every position with features
+        use_store (bool, optional): reuse model data from the feature store. Default: True
+        workers (int, optional): number of processes used to import sheets and build positions, 1 builds serially. Default: 1
+        
+    Returns:
+        dict: {pos: pd.DataFrame}
+    '''
+    global positions
+    global weeks
+    global stats_w_opp_dict
+
+    if isinstance(pos_list, bool):
+        pos_list = list(stats_w_opp_dict.keys())
+    result_weeks = weeks[1:]
+
+    # Find the weeks each position needs built
+    feature_specs = {}
+    store_dirs = {}
+    fingerprints = {}
+    build_weeks = {}
+    for pos in pos_list:
+        assert pos in positions
+        feature_specs[pos] = get_feature_specs(pos)
+        store_dirs[pos] = get_feature_store_dir(pos, feature_specs[pos], use_store)
+        if store_dirs[pos]:
+            fingerprints[pos] = get_feature_fingerprints(feature_specs[pos], result_weeks)
+            build_weeks[pos] = get_stale_weeks(store_dirs[pos], fingerprints[pos])
+        else:
+            build_weeks[pos] = result_weeks
+
+    new_data = {}
+    to_build = [pos for pos in pos_list if build_weeks[pos]]
+    if to_build:
+        print('Importing player data...')
+        player_stats = fdi.import_player_with_util_data('all_valid', file_path_dict, workers=workers)
+        status_index = fdi.import_player_status_index('all_valid', file_path_dict, player_stats)
+        print(f'Adding retro data for {", ".join(to_build)}...')
+        with fdi.get_import_executor(min(workers, len(to_build))) as executor:
+            jobs = {}
+            for pos in to_build:
+                build_args = (pos, player_stats, status_index, feature_specs[pos], build_weeks[pos])
+                if executor is None:
+                    new_data[pos] = build_model_data(*build_args)
+                else:
+                    jobs[pos] = executor.submit(build_model_data, *build_args)
+            for pos in jobs:
+                new_data[pos] = jobs[pos].result()
+
+    model_data = {}
+    for pos in pos_list:
+        if not(store_dirs[pos]):
+            model_data[pos] = sort_model_data(new_data[pos])
+            continue
+        if pos in new_data:
+            write_model_data(store_dirs[pos], new_data[pos], {week: fingerprints[pos][week] for week in build_weeks[pos]})
+        model_data[pos] = read_model_data(store_dirs[pos], result_weeks)
     return model_data
 
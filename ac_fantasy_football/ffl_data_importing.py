@@ -1,5 +1,18 @@
 import pandas as pd
 import numpy as np
+import hashlib
+import json
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+try:
+    import pyarrow  # Parquet engine used by the season store
+except ImportError:
+    pyarrow = None
 
 # Standard Globals
 valid_sheet_names = ['WK1', 'WK2', 'WK3', 'WK4', 'WK5', 'WK6', 'WK7', 'WK8']  # Update this as changes are made to source spreadsheet
@@ -11,6 +24,8 @@ teams = ['ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', '
 na_val = '--'
 filler_value = '*--*'
 standard_columns = ['PLAYER', 'POS', 'TEAM', 'OPPONENT', 'WEEK', 'FPTS']
+category_columns = ['PLAYER', 'TEAM', 'POS', 'OWNER', 'OPPONENT', 'WEEK']  # Repeated labels stored as categoricals
+bool_columns = ['OUT', 'BYE']
 basic_stats = {'QB': ['PAYDS', 'PATD', 'INT', 'CAR', 'RUYDS', 'RUTD', 'FUML'],
              'RB': ['CAR', 'RUYDS', 'RUTD', 'REC', 'REYDS', 'RETD', 'FUML'],
              'WR': ['CAR', 'RUYDS', 'RUTD', 'REC', 'REYDS', 'RETD', 'FUML'],
@@ -27,13 +42,21 @@ file_path_dict = {'player_data_by_week': 'ac_fantasy_football\\player_data_by_we
                   'players_out_by_week': 'ac_fantasy_football\\players_out_by_week.xlsx',
                   'ref_for_manual_corrections': 'ac_fantasy_football\\ref_for_manual_corrections.xlsx',
                   'nfl_schedule_2024': 'ac_fantasy_football\\nfl_schedule_2024.xlsx',
-                  'current_league_info': 'ac_fantasy_football\\current_league_info.xlsx'
+                  'current_league_info': 'ac_fantasy_football\\current_league_info.xlsx',
+                  'season_store': 'ac_fantasy_football\\season_store',
+                  'feature_store': 'ac_fantasy_football\\feature_store',
+                  'model_artifacts': 'ac_fantasy_football\\model_artifacts'
 }
+store_version = 1   # Bump when a change to the parsing functions alters their output
+store_decoders = {'str': str, 'int': int, 'float': float, 'bool': lambda value: value == 'True'}
+team_pos_mappings_cache = {}    # {season fingerprint: {PLAYER: [TEAM, POS]}}, filled by import_nfl_team_pos_mappings
+player_status_index_cache = {}  # {(season fingerprint, weeks): pd.DataFrame}, filled by import_player_status_index
+worker_workbooks = {}   # {file path: ((mtime, size), pd.ExcelFile)}, workbooks open in a worker process, filled by get_worker_workbook
 
 
 
 # Importing player data with basic stats
-def import_player_data(selected_weeks, file_path_dict, w_dnp_info=True):
+def import_player_data(selected_weeks, file_path_dict, w_dnp_info=True, use_store=True, executor=None):
     ''' 
     Import offensive player data from Excel for the weeks in the selected_weeks. 
     Input should be a string or list, like 'WK1', ['WK1', 'WK2'], or 'all_valid' to select all valid weeks.
@@ -45,6 +68,8 @@ def import_player_data(selected_weeks, file_path_dict, w_dnp_info=True):
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
         w_dnp_info (bool, optional): include rows for players out or on bye.
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        executor (ProcessPoolExecutor, optional): if included, sheets are parsed in parallel, one job per sheet. Default: None
 
     Returns:
         pd.DataFrame: offensive player data
@@ -55,37 +80,31 @@ def import_player_data(selected_weeks, file_path_dict, w_dnp_info=True):
     stats_cols = [7,8,9,10,11,12,13,14,15,16,17,18,19,20,21]
     column_labels = ['C/A', 'PAYDS', 'PATD', 'INT', 'CAR', 'RUYDS', 'RUTD', 'REC', 'REYDS', 'RETD', 'TAR', '2PC', 'FUML', 'MISCTD', 'FPTS']
 
-    # Initialize summary
-    player_stats_summary = pd.DataFrame()
     selected_weeks = convert_selected_weeks_input(selected_weeks)
     validate_selected_weeks(selected_weeks)
     
-    for sheet in selected_weeks:
-        # Import from Excel
-        players = import_player_data_from_file(file_path_dict['player_data_by_week'], sheet, players_cols)
-        stats = import_stats_data_from_file(file_path_dict['player_data_by_week'], sheet, stats_cols, column_labels)
-        # Combine player and stats to one table
-        players_stats = pd.concat([players, stats], axis=1)
-        # Add column for week
-        players_stats['WEEK'] = sheet
-        # Append data to summary df
-        player_stats_summary = pd.concat([player_stats_summary, players_stats], ignore_index=True)
+    # Import from Excel or the season store, one dataframe per week
+    weekly_data = import_weekly_data('player_data_by_week', selected_weeks, file_path_dict, parse_player_stats_sheet, 
+                                     (players_cols, stats_cols, column_labels), use_store=use_store, executor=executor)
+    player_stats_summary = pd.concat(weekly_data, ignore_index=True)
 
     player_stats_summary['TEAM'] = convert_team_ini_to_standard(player_stats_summary['TEAM'])
     player_stats_summary['OPPONENT'] = convert_team_ini_to_standard(player_stats_summary['OPPONENT'])
     player_stats_summary = add_OUT_and_BYE(player_stats_summary, stat_to_check='CAR', stat_val_to_check='--')
     if w_dnp_info:
-        player_stats_summary = add_dnp_players(player_stats_summary, selected_weeks, file_path_dict)
+        player_stats_summary = add_dnp_players(player_stats_summary, selected_weeks, file_path_dict, use_store=use_store, executor=executor)
 
-    player_stats_summary = player_stats_summary.reset_index(drop=True)
+    player_stats_summary = apply_player_data_schema(player_stats_summary.reset_index(drop=True))
     return player_stats_summary
-def import_kicker_data(selected_weeks, file_path_dict):
+def import_kicker_data(selected_weeks, file_path_dict, use_store=True, executor=None):
     '''
     Import kicker data from Excel. Excludes data for bye weeks. Returns dataframe.
     Args:
         selected_weeks (str or list): weeks to return data for. 'all' for all weeks, 'all_valid' for previous weeks. 
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        executor (ProcessPoolExecutor, optional): if included, sheets are parsed in parallel, one job per sheet. Default: None
 
     Returns:
         pd.DataFrame: kicker data
@@ -95,43 +114,34 @@ def import_kicker_data(selected_weeks, file_path_dict):
     stats_cols = [7,8,9,10,11,12]
     column_labels = ['FG39/FGA39', 'FG49/FGA49', 'FG50+/FGA50+', 'FG/FGA', 'XP/XPA', 'FPTS']
     
-    # Initialize summary
-    player_stats_summary = pd.DataFrame()
     selected_weeks = convert_selected_weeks_input(selected_weeks)
     validate_selected_weeks(selected_weeks)
-    for sheet in selected_weeks:
-        # Import from Excel
-        players = import_player_data_from_file(file_path_dict['kicker_data_by_week'], sheet, players_cols)
-        stats = import_stats_data_from_file(file_path_dict['kicker_data_by_week'], sheet, stats_cols, column_labels, type='Kicker')
-        # Combine player and stats to one table
-        players_stats = pd.concat([players, stats], axis=1)
-        # Add column for week
-        players_stats['WEEK'] = sheet
-        # Append data to summary df
-        player_stats_summary = pd.concat([player_stats_summary, players_stats], ignore_index=True)
+
+    # Import from Excel or the season store, one dataframe per week
+    weekly_data = import_weekly_data('kicker_data_by_week', selected_weeks, file_path_dict, parse_player_stats_sheet, 
+                                     (players_cols, stats_cols, column_labels, 'Kicker'), use_store=use_store, executor=executor)
+    player_stats_summary = pd.concat(weekly_data, ignore_index=True)
 
     player_stats_summary['TEAM'] = convert_team_ini_to_standard(player_stats_summary['TEAM'])
     player_stats_summary['OPPONENT'] = convert_team_ini_to_standard(player_stats_summary['OPPONENT'])
     player_stats_summary = add_OUT_and_BYE(player_stats_summary, stat_to_check='FG/FGA', stat_val_to_check='--/--')
 
-    for index, row in player_stats_summary.iterrows():
-        if row['OUT'] | row['BYE']:
-            continue
-        #print(row['PLAYER'], " ", row['WEEK'])
-        xptm = (row['XP/XPA'].split('/'))[0]
-        fg50 = (row['FG50+/FGA50+'].split('/'))[0]
-        fg40 = (row['FG49/FGA49'].split('/'))[0]
-        fg0 = int((row['FG/FGA'].split('/'))[0]) - int(fg50) - int(fg40)
-        fgm = int((row['FG/FGA'].split('/'))[1]) - int((row['FG/FGA'].split('/'))[0])
-
-        player_stats_summary.loc[index, 'XPTM'] = xptm
-        player_stats_summary.loc[index, 'FG50'] = fg50
-        player_stats_summary.loc[index, 'FG40'] = fg40
-        player_stats_summary.loc[index, 'FG0'] = fg0
-        player_stats_summary.loc[index, 'FGM'] = fgm
+    # Kicking stats for players who did not play are left missing
+    dnp = player_stats_summary['OUT'] | player_stats_summary['BYE']
+    xp_made, xp_att = split_made_attempted(player_stats_summary['XP/XPA'], dnp)
+    fg50_made, fg50_att = split_made_attempted(player_stats_summary['FG50+/FGA50+'], dnp)
+    fg40_made, fg40_att = split_made_attempted(player_stats_summary['FG49/FGA49'], dnp)
+    fg_made, fg_att = split_made_attempted(player_stats_summary['FG/FGA'], dnp)
+
+    player_stats_summary['XPTM'] = xp_made
+    player_stats_summary['FG50'] = fg50_made
+    player_stats_summary['FG40'] = fg40_made
+    player_stats_summary['FG0'] = fg_made - fg50_made - fg40_made
+    player_stats_summary['FGM'] = fg_att - fg_made
     
+    player_stats_summary = apply_player_data_schema(player_stats_summary)
     return player_stats_summary
-def import_defense_data(selected_weeks, file_path_dict, def_scoring_ranges=False):
+def import_defense_data(selected_weeks, file_path_dict, def_scoring_ranges=False, use_store=True, executor=None):
     '''
     Import defense data from Excel. Excludes data for bye weeks. Returns dataframe.
     
@@ -141,6 +151,8 @@ def import_defense_data(selected_weeks, file_path_dict, def_scoring_ranges=False
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
         def_scoring_ranges (dict or bool, optional): dictionary of defense points against and yards against scoring rules like {'PA0': 5, 'PA1': 4, 'PA7': 3 ... 'YA100': 5 ...}
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        executor (ProcessPoolExecutor, optional): if included, sheets are parsed in parallel, one job per sheet. Default: None
 
     Returns:
         pd.DataFrame: team defense data
@@ -151,20 +163,13 @@ def import_defense_data(selected_weeks, file_path_dict, def_scoring_ranges=False
     stats_cols = [7,8,9,10,11,12,13,14,15]
     column_labels = ['DEFTD', 'DEFINT', 'FR', 'SCK', 'SFTY', 'BLK', 'PA', 'YA', 'FPTS']
     
-    # Initialize summary
-    player_stats_summary = pd.DataFrame()
     selected_weeks = convert_selected_weeks_input(selected_weeks)
     validate_selected_weeks(selected_weeks)
-    for sheet in selected_weeks:
-        # Import from Excel
-        players = import_player_data_from_file(file_path_dict['defense_data_by_week'], sheet, players_cols)
-        stats = import_stats_data_from_file(file_path_dict['defense_data_by_week'], sheet, stats_cols, column_labels, type='Defense')
-        # Combine player and stats to one table
-        players_stats = pd.concat([players, stats], axis=1)
-        # Add column for week
-        players_stats['WEEK'] = sheet
-        # Append data to summary df
-        player_stats_summary = pd.concat([player_stats_summary, players_stats], ignore_index=True)
+
+    # Import from Excel or the season store, one dataframe per week
+    weekly_data = import_weekly_data('defense_data_by_week', selected_weeks, file_path_dict, parse_player_stats_sheet, 
+                                     (players_cols, stats_cols, column_labels, 'Defense'), use_store=use_store, executor=executor)
+    player_stats_summary = pd.concat(weekly_data, ignore_index=True)
 
     player_stats_summary['TEAM'] = convert_team_ini_to_standard(player_stats_summary['TEAM'])
     player_stats_summary['OPPONENT'] = convert_team_ini_to_standard(player_stats_summary['OPPONENT'])
@@ -172,29 +177,21 @@ def import_defense_data(selected_weeks, file_path_dict, def_scoring_ranges=False
     player_stats_summary = add_OUT_and_BYE(player_stats_summary, stat_to_check='PA', stat_val_to_check='--')
 
     if def_scoring_ranges:
-        # Create PAPTS and YAPTS for defensive fantasy scoring
-        player_stats_summary.loc[(player_stats_summary['PA'] == na_val), 'PA'] = -1
-        player_stats_summary.loc[(player_stats_summary['YA'] == na_val), 'YA'] = -1
-
-        player_stats_summary['PA'] = player_stats_summary['PA'].astype(int)
-        player_stats_summary['YA'] = player_stats_summary['YA'].astype(int)
-
-        player_stats_summary['PAPTS'] = pd.cut(player_stats_summary['PA'], bins=[-2, -1, 0, 6, 13, 17, 27, 34, 45, 200], 
-                                            labels=[na_val, def_scoring_ranges['PA0'], def_scoring_ranges['PA1'], def_scoring_ranges['PA7'], def_scoring_ranges['PA14'],
-                                                    def_scoring_ranges['PA18'], def_scoring_ranges['PA28'], def_scoring_ranges['PA35'], def_scoring_ranges['PA46']])
-        player_stats_summary['YAPTS'] = pd.cut(player_stats_summary['YA'], bins=[-2, -1, 99, 199, 299, 349, 399, 449, 499, 549, 1000], 
-                                            labels=[na_val, def_scoring_ranges['YA100'], def_scoring_ranges['YA199'], def_scoring_ranges['YA299'], def_scoring_ranges['YA349'],
+        # Create PAPTS and YAPTS for defensive fantasy scoring, left missing for defenses that did not play
+        points_against = pd.to_numeric(player_stats_summary['PA'].mask(player_stats_summary['PA'] == na_val))
+        yards_against = pd.to_numeric(player_stats_summary['YA'].mask(player_stats_summary['YA'] == na_val))
+
+        player_stats_summary['PAPTS'] = pd.cut(points_against, bins=[-1, 0, 6, 13, 17, 27, 34, 45, 200], 
+                                            labels=[def_scoring_ranges['PA0'], def_scoring_ranges['PA1'], def_scoring_ranges['PA7'], def_scoring_ranges['PA14'],
+                                                    def_scoring_ranges['PA18'], def_scoring_ranges['PA28'], def_scoring_ranges['PA35'], def_scoring_ranges['PA46']]).astype(float)
+        player_stats_summary['YAPTS'] = pd.cut(yards_against, bins=[-1, 99, 199, 299, 349, 399, 449, 499, 549, 1000], 
+                                            labels=[def_scoring_ranges['YA100'], def_scoring_ranges['YA199'], def_scoring_ranges['YA299'], def_scoring_ranges['YA349'],
                                                     def_scoring_ranges['YA399'], def_scoring_ranges['YA449'], def_scoring_ranges['YA499'], def_scoring_ranges['YA549'],
-                                                    def_scoring_ranges['YA550']])
-
-        player_stats_summary['PA'] = player_stats_summary['PA'].astype(str)
-        player_stats_summary['YA'] = player_stats_summary['YA'].astype(str)
-
-        player_stats_summary.loc[(player_stats_summary['PA'] == '-1'), 'PA'] = na_val
-        player_stats_summary.loc[(player_stats_summary['YA'] == '-1'), 'YA'] = na_val
+                                                    def_scoring_ranges['YA550']]).astype(float)
 
+    player_stats_summary = apply_player_data_schema(player_stats_summary)
     return player_stats_summary
-def import_full_team_data(selected_weeks, file_path_dict, defense_scoring_ranges=False):
+def import_full_team_data(selected_weeks, file_path_dict, defense_scoring_ranges=False, use_store=True, workers=1):
     '''
     Forms a merged dataframe using import player, kicker, and defense data. Returns a dataframe.
     
@@ -202,20 +199,26 @@ def import_full_team_data(selected_weeks, file_path_dict, defense_scoring_ranges
         selected_weeks (str or list): weeks to return data for. 'all' for all weeks, 'all_valid' for previous weeks. 
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         defense_scoring_ranges (dict or bool): dictionary of defense points against and yards against scoring rules like {'PA0': 5, 'PA1': 4, 'PA7': 3 ... 'YA100': 5 ...}
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        workers (int, optional): number of processes used to parse sheets in parallel, 1 parses sheets serially. Default: 1
 
     Returns:
         pd.DataFrame: all fantasy player data
     '''
-    player_data = import_player_data(selected_weeks, file_path_dict)
-    kicker_data = import_kicker_data(selected_weeks, file_path_dict)
-    defense_data = import_defense_data(selected_weeks, file_path_dict, defense_scoring_ranges)
+    with get_import_executor(workers) as executor:
+        player_data = import_player_data(selected_weeks, file_path_dict, use_store=use_store, executor=executor)
+        kicker_data = import_kicker_data(selected_weeks, file_path_dict, use_store=use_store, executor=executor)
+        defense_data = import_defense_data(selected_weeks, file_path_dict, defense_scoring_ranges, use_store=use_store, executor=executor)
     
-    merged = pd.concat([player_data, kicker_data, defense_data], join='outer')
-    merged = merged.infer_objects(copy=False).fillna(0).reset_index(drop=True)
+    # Stats a position does not record are zero, stats for players who did not play stay missing
+    frames = [player_data, kicker_data, defense_data]
+    columns = pd.concat([frame.head(0) for frame in frames], join='outer').columns
+    merged = pd.concat([frame.reindex(columns=columns, fill_value=0) for frame in frames], ignore_index=True)
+    merged = apply_player_data_schema(merged)
     return merged
 
 # Importing offensive player data with snap count information
-def import_utilization_data(selected_weeks, file_path_dict):
+def import_utilization_data(selected_weeks, file_path_dict, use_store=True, executor=None):
     '''
     Import utilization data from Excel for the weeks in the selected_weeks. 
 
@@ -223,6 +226,8 @@ def import_utilization_data(selected_weeks, file_path_dict):
         selected_weeks (str or list): weeks to return data for. 'all' for all weeks, 'all_valid' for previous weeks. 
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        executor (ProcessPoolExecutor, optional): if included, sheets are parsed in parallel, one job per sheet. Default: None
 
     Returns:
         pd.DataFrame: offensive player utilization data
@@ -231,19 +236,14 @@ def import_utilization_data(selected_weeks, file_path_dict):
     # Static values
     util_cols = [0,1,2,3,4,5,6,7,8,9,10,11,12]
     global utilization_data_file 
-    # Initialize summary
-    util_summary = pd.DataFrame()
     selected_weeks = convert_selected_weeks_input(selected_weeks)
     validate_selected_weeks(selected_weeks)
-    for sheet in selected_weeks:
-        # Import from Excel
-        util_data = import_utilization_data_from_file(file_path_dict['utilization_data'], sheet, util_cols)
-        # Add column for week
-        util_data['WEEK'] = sheet
-        # Append data to summary df
-        util_summary = pd.concat([util_summary, util_data], ignore_index=True)
+    # Import from Excel or the season store, one dataframe per week
+    weekly_data = import_weekly_data('utilization_data', selected_weeks, file_path_dict, parse_utilization_sheet, 
+                                     (util_cols,), skiprows=1, use_store=use_store, executor=executor)
+    util_summary = pd.concat(weekly_data, ignore_index=True)
     return util_summary
-def import_player_with_util_data(selected_weeks, file_path_dict):
+def import_player_with_util_data(selected_weeks, file_path_dict, use_store=True, workers=1):
     '''
     selected_weeks must be either a string like 'WK1', 'WK2', or 'all', or a list of these values.
     Imports data using import_player_data and import_utilization_data and merges the two with an outer join. 
@@ -252,6 +252,8 @@ def import_player_with_util_data(selected_weeks, file_path_dict):
         selected_weeks (str or list): weeks to return data for. 'all' for all weeks, 'all_valid' for previous weeks. 
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        workers (int, optional): number of processes used to parse sheets in parallel, 1 parses sheets serially. Default: 1
         
     Returns:
         pd.DataFrame: offensive player data with utilization stats
@@ -259,9 +261,11 @@ def import_player_with_util_data(selected_weeks, file_path_dict):
     '''
     global teams
 
-    player_data = import_player_data(selected_weeks, file_path_dict)
-    util_data = import_utilization_data(selected_weeks, file_path_dict)
+    with get_import_executor(workers) as executor:
+        player_data = import_player_data(selected_weeks, file_path_dict, use_store=use_store, executor=executor)
+        util_data = import_utilization_data(selected_weeks, file_path_dict, use_store=use_store, executor=executor)
     new_table = player_data.merge(util_data, on=['PLAYER', 'POS', 'WEEK','TEAM'], how='outer', suffixes=('','_U'))
+    new_table['OPPONENT'] = new_table['OPPONENT'].astype(object)
     
     opp_dict = {}
     filled_opp = new_table[~new_table['OPPONENT'].isna()]
@@ -284,6 +288,7 @@ def import_player_with_util_data(selected_weeks, file_path_dict):
             else:
                 new_table.loc[index, 'OPPONENT'] = 'BYE WEEK'
         
+    new_table = apply_player_data_schema(new_table)
     return new_table
 
 # Other imports to be used with the player_data dataframe
@@ -328,31 +333,64 @@ def import_recent_roster_mappings(owners_for_manual_corrections, file_path_dict,
     if owners_for_manual_corrections:
         map_dict = run_manual_roster_corrections(map_dict, owners_for_manual_corrections, file_path_dict)
     return map_dict
-def import_nfl_team_pos_mappings(file_path_dict):
+def import_nfl_team_pos_mappings(file_path_dict, player_data=None):
     '''
     Import a dictionary {'PLAYER': ['TEAM', 'POS']} based on most recent additions to scoring data. Returns a dictionary.
+    Built from player_data when it is passed, otherwise from a single import of all valid weeks. The import is memoized 
+    for the current state of the weekly workbooks, so repeat calls only rebuild the mappings after a sheet changes.
     
     Args:
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        player_data (pd.DataFrame, optional): already imported player data to build the mappings from. Default: None
 
     Returns:
         dict: {PLAYER: [TEAM, POS]}
     '''
-    global valid_sheet_names
-    most_recent = valid_sheet_names
-    most_recent.reverse()
-    map_dict = {}
-    for week in most_recent:
-        player_data = import_full_team_data(week, file_path_dict)
-        player_data = player_data[['PLAYER', 'TEAM', 'POS']]
-        for index, row in player_data.iterrows():
-            if not(row['PLAYER'] in map_dict.keys()):
-                if row['TEAM'] not in teams:
-                    map_dict[row['PLAYER']] = [row['POS'], row['TEAM']]
-                else:
-                    map_dict[row['PLAYER']] = [row['TEAM'], row['POS']]
-   
-    return map_dict
+    global team_pos_mappings_cache
+    if player_data is not None:
+        return build_team_pos_mappings(player_data)
+
+    season_key = get_season_fingerprint(file_path_dict, ['player_data_by_week', 'kicker_data_by_week', 'defense_data_by_week', 'players_out_by_week'])
+    if season_key not in team_pos_mappings_cache:
+        team_pos_mappings_cache[season_key] = build_team_pos_mappings(import_full_team_data('all_valid', file_path_dict))
+    return {player: list(team_pos) for player, team_pos in team_pos_mappings_cache[season_key].items()}
+def build_team_pos_mappings(player_data):
+    '''
+    Builds {'PLAYER': ['TEAM', 'POS']} from each player's most recent week in player_data. Players without a standard 
+    team (free agents) are listed as [POS, TEAM]. Returns a dictionary.
+    
+    Args:
+        player_data (pd.DataFrame): player data with PLAYER, TEAM, POS and WEEK columns
+
+    Returns:
+        dict: {PLAYER: [TEAM, POS]}
+    '''
+    global teams
+    latest = get_latest_team_pos(player_data)
+
+    standard_team = latest['TEAM'].isin(teams)
+    first = latest['TEAM'].where(standard_team, latest['POS'])
+    second = latest['POS'].where(standard_team, latest['TEAM'])
+    return {player: [value1, value2] for player, value1, value2 in zip(latest.index, first, second)}
+def get_latest_team_pos(player_data):
+    '''
+    Returns each player's TEAM and POS from their most recent week in player_data, using the first listing of a player 
+    within a week. Returns a dataframe indexed by PLAYER.
+    
+    Args:
+        player_data (pd.DataFrame): player data with PLAYER, TEAM, POS and WEEK columns
+
+    Returns:
+        pd.DataFrame: TEAM and POS columns with PLAYER as index
+    '''
+    global all_sheet_names
+    week_order = {week: num for num, week in enumerate(all_sheet_names)}
+
+    latest = player_data[['PLAYER', 'TEAM', 'POS', 'WEEK']].astype(object)
+    latest = latest.drop_duplicates(subset=['PLAYER', 'WEEK'], keep='first')
+    latest = latest.assign(WEEK_NUM=latest['WEEK'].map(week_order)).sort_values('WEEK_NUM', kind='stable')
+    latest = latest.drop_duplicates(subset='PLAYER', keep='last')
+    return latest.set_index('PLAYER')[['TEAM', 'POS']]
 def run_manual_roster_corrections(map_dict, owners_for_manual_correction, file_path_dict):
     '''
     For import_recent_roster_mappings, manual corrections for teams with the same initials.
@@ -406,7 +444,7 @@ def run_manual_roster_corrections(map_dict, owners_for_manual_correction, file_p
             if value == old_name:
                 map_dict[key] = 'FA'
     return map_dict
-def import_player_status(selected_weeks, file_path_dict):
+def import_player_status(selected_weeks, file_path_dict, use_store=True, executor=None):
     ''' 
     Import player status data for the selected weeks from Excel. Returns dataframe.
     
@@ -414,6 +452,8 @@ def import_player_status(selected_weeks, file_path_dict):
         selected_weeks (str or list): weeks to return data for. 'all' for all weeks, 'all_valid' for previous weeks. 
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        executor (ProcessPoolExecutor, optional): if included, sheets are parsed in parallel, one job per sheet. Default: None
 
     Returns:
         pd.DataFrame: players who were out or on bye on a given week.
@@ -421,19 +461,14 @@ def import_player_status(selected_weeks, file_path_dict):
     # Static values
     status_cols = [0,1,2,3]
     
-    # Initialize summary
-    summary = pd.DataFrame()
     selected_weeks = convert_selected_weeks_input(selected_weeks)
     validate_selected_weeks(selected_weeks)
-    for sheet in selected_weeks:
-        # Import from Excel
-        data = pd.read_excel(file_path_dict['players_out_by_week'], sheet_name=sheet, usecols=status_cols)
-        # Add column for week
-        data['WEEK'] = sheet
-        # Append data to summary df
-        summary = pd.concat([summary, data], ignore_index=True)
+    # Import from Excel or the season store, one dataframe per week
+    weekly_data = import_weekly_data('players_out_by_week', selected_weeks, file_path_dict, parse_player_status_sheet, 
+                                     (status_cols,), use_store=use_store, executor=executor)
+    summary = pd.concat(weekly_data, ignore_index=True)
     return summary
-def import_player_status_dict(selected_weeks, file_path_dict):
+def import_player_status_dict(selected_weeks, file_path_dict, use_store=True, executor=None):
     '''
     Reformats output of import_player_status. Returns dictionary formatted {('PLAYER', 'TEAM', 'POS'): {'WEEK': 'STATUS'}} where status is either 'Out' or 'BYE'.
     
@@ -441,6 +476,8 @@ def import_player_status_dict(selected_weeks, file_path_dict):
         selected_weeks (str or list): weeks to return data for. 'all' for all weeks, 'all_valid' for previous weeks. 
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        executor (ProcessPoolExecutor, optional): if included, sheets are parsed in parallel, one job per sheet. Default: None
 
     Returns:
         dict: {('PLAYER', 'TEAM', 'POS'): {'WEEK': 'STATUS'}}
@@ -448,7 +485,7 @@ def import_player_status_dict(selected_weeks, file_path_dict):
     '''
     global teams
 
-    player_status_df = import_player_status(selected_weeks, file_path_dict)
+    player_status_df = import_player_status(selected_weeks, file_path_dict, use_store=use_store, executor=executor)
     #print(player_status_df.head())
     player_status_dict = {}
     for index, row in player_status_df.iterrows():
@@ -460,6 +497,64 @@ def import_player_status_dict(selected_weeks, file_path_dict):
         else:
             player_status_dict[(row['PLAYER'], team, pos)] = {row['WEEK']: row['STATUS']}
     return player_status_dict
+def import_player_status_index(selected_weeks, file_path_dict, player_data=None, use_store=True):
+    '''
+    Import a bool player x week index of whether each player played, was out or was on bye. Out and bye weeks come only 
+    from the players_out_by_week file, like import_player_status, so a week flagged OUT or BYE in player data but not listed 
+    there still counts as a week the player could have played. Played weeks are player data rows without an OUT or BYE flag 
+    that are not listed as out. Built from player_data when it is passed, otherwise built from import_player_data once per 
+    state of the weekly workbooks and memoized. Weeks a player is missing from the data are False in all three. Returns 
+    dataframe, use index.loc[player, 'OUT'] for a row of weeks.
+    
+    Args:
+        selected_weeks (str or list): weeks to return data for. 'all' for all weeks, 'all_valid' for previous weeks. 
+            Otherwise a string or list of strings like 'WK1', 'WK2', etc.
+        file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        player_data (pd.DataFrame, optional): already imported player data with OUT and BYE columns. Default: None
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+
+    Returns:
+        pd.DataFrame: PLAYER as index, columns ('PLAYED', 'OUT' or 'BYE', WEEK)
+    '''
+    global player_status_index_cache
+    selected_weeks = convert_selected_weeks_input(selected_weeks)
+    validate_selected_weeks(selected_weeks)
+    if player_data is not None:
+        player_status = import_player_status(selected_weeks, file_path_dict, use_store=use_store)
+        return build_player_status_index(player_data, player_status, selected_weeks)
+
+    season_key = (get_season_fingerprint(file_path_dict, ['player_data_by_week', 'players_out_by_week'], selected_weeks), tuple(selected_weeks))
+    if season_key not in player_status_index_cache:
+        player_data = import_player_data(selected_weeks, file_path_dict, w_dnp_info=False, use_store=use_store)
+        player_status = import_player_status(selected_weeks, file_path_dict, use_store=use_store)
+        player_status_index_cache[season_key] = build_player_status_index(player_data, player_status, selected_weeks)
+    return player_status_index_cache[season_key].copy()
+def build_player_status_index(player_data, player_status, selected_weeks):
+    '''
+    Builds the bool player x week played/out/bye index, out and bye weeks from the player status import only. Returns dataframe.
+    
+    Args:
+        player_data (pd.DataFrame): player data with PLAYER, WEEK, OUT and BYE columns
+        player_status (pd.DataFrame): output of import_player_status
+        selected_weeks (list): weeks to include as columns
+
+    Returns:
+        pd.DataFrame: PLAYER as index, columns ('PLAYED', 'OUT' or 'BYE', WEEK)
+    '''
+    out = player_data['OUT'].to_numpy(dtype=bool)
+    bye = player_data['BYE'].to_numpy(dtype=bool)
+    status_bye = (player_status['STATUS'].str.upper() == 'BYE').to_numpy()
+    flags = pd.concat([pd.DataFrame({'PLAYER': player_data['PLAYER'].astype(object).to_numpy(), 'WEEK': player_data['WEEK'].astype(object).to_numpy(), 
+                                     'PLAYED': ~(out | bye), 'OUT': False, 'BYE': False}),
+                       pd.DataFrame({'PLAYER': player_status['PLAYER'].to_numpy(), 'WEEK': player_status['WEEK'].to_numpy(), 
+                                     'PLAYED': False, 'OUT': ~status_bye, 'BYE': status_bye})], ignore_index=True)
+    flags = flags[flags['WEEK'].isin(selected_weeks)]
+
+    status_index = flags.groupby(['PLAYER', 'WEEK'])[['PLAYED', 'OUT', 'BYE']].any().unstack('WEEK', fill_value=False)
+    columns = pd.MultiIndex.from_product([['PLAYED', 'OUT', 'BYE'], selected_weeks], names=['STATUS', 'WEEK'])
+    status_index = status_index.reindex(columns=columns, fill_value=False)
+    status_index['PLAYED'] = status_index['PLAYED'] & ~(status_index['OUT'] | status_index['BYE'])
+    return status_index
 def import_nfl_schedule_dict(file_path_dict, selected_weeks='all'):
     '''
     Import a dictionary of the NFL schedule with teams as primary key, week as secondary key, and opponent as value. Returns dictionary.
@@ -473,12 +568,11 @@ def import_nfl_schedule_dict(file_path_dict, selected_weeks='all'):
         dict: {TEAM: {WEEK: OPPONENT}}
 
     '''
-    global nfl_schedule_file
     selected_weeks = convert_selected_weeks_input(selected_weeks)
     schedule_dict = {}
 
     # Import
-    schedule = pd.read_excel(file_path_dict['nfl_schedule_2024'], index_col=0)
+    schedule = import_nfl_schedule(file_path_dict)
     
     for team, row in schedule.iterrows():
         for week in selected_weeks:
@@ -487,6 +581,18 @@ def import_nfl_schedule_dict(file_path_dict, selected_weeks='all'):
             else:
                 schedule_dict[team] = {week: row[week]}
     return schedule_dict
+def import_nfl_schedule(file_path_dict):
+    '''
+    Import the NFL schedule with teams as the index and weeks as columns, values are opponents or 'BYE'. Returns dataframe.
+    
+    Args:
+        file_path_dict (dict): dictionary with original file name as keys and file paths as values
+
+    Returns:
+        pd.DataFrame: NFL schedule, one row per team
+    '''
+    schedule = pd.read_excel(file_path_dict['nfl_schedule_2024'], index_col=0)
+    return schedule
 def import_owner_matchups(file_path_dict):
     '''
     Import owner matchups from current league info with owners as the index. Returns dataframe.
@@ -534,7 +640,7 @@ def add_OUT_and_BYE(player_stats_summary, stat_to_check, stat_val_to_check):
     player_stats_summary = player_stats_summary.assign(BYE=lambda x: ((x[stat_to_check] == stat_val_to_check) & (x['OPPONENT'] == '*BYE*')))
 
     return player_stats_summary
-def add_dnp_players(player_stats_summary, selected_weeks, file_path_dict):
+def add_dnp_players(player_stats_summary, selected_weeks, file_path_dict, use_store=True, executor=None):
     '''
     Specific to import_player_data (does not include defense or kicker data). Adds rows in player_stats_summary for players who did not play 
     on a given week listed in the players_out_by_week Excel file. Returns the expanded dataframe
@@ -544,115 +650,263 @@ def add_dnp_players(player_stats_summary, selected_weeks, file_path_dict):
         selected_weeks (str or list): weeks to return data for. 'all' for all weeks, 'all_valid' for previous weeks. 
             Otherwise a string or list of strings like 'WK1', 'WK2', etc.
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        use_store (bool, optional): reuse parsed weeks from the season store when their sheets are unchanged. Default: True
+        executor (ProcessPoolExecutor, optional): if included, sheets are parsed in parallel, one job per sheet. Default: None
 
 
     Returns:
         pd.DataFrame: player_stats_summary with added rows
     '''
-    global na_val
     global teams
     global positions
     
-    df_set_index = player_stats_summary.set_index(['PLAYER', 'WEEK'])
-    player_status_dict = import_player_status_dict(selected_weeks, file_path_dict)
-    new_entries = pd.DataFrame(columns=player_stats_summary.columns)
-    index = 0
-    # key1 is player, key2 is week
-    for key1, value1 in player_status_dict.items():
-        for key2, value2 in value1.items():
-            # If the entry doesn't already exist in the dataframe
-            if not((key1, key2) in df_set_index.index):
-                new_entries.loc[index, 'PLAYER'] = key1[0]
-                new_entries.loc[index, 'WEEK'] = key2
-
-                assert key1[1] in teams
-                assert key1[2] in positions
-
-                new_entries.loc[index, 'TEAM'] = key1[1]
-                new_entries.loc[index, 'POS'] = key1[2]
-                if value2.str.upper() == 'BYE':
-                    new_entries.loc[index, 'BYE'] = True
-                    new_entries.loc[index, 'OUT'] = False
-                else: 
-                    new_entries.loc[index, 'BYE'] = False
-                    new_entries.loc[index, 'OUT'] = True
-                index+=1
-    
-    new_entries = new_entries.infer_objects(copy=False)
-    values_dict = get_row_for_out_bye(new_entries.columns) # Filling NA, no need to worry about OUT/BYE args
-    for col in new_entries.columns:
-        new_entries[col].fillna(values_dict[col])
+    player_status = import_player_status(selected_weeks, file_path_dict, use_store=use_store, executor=executor)
+    player_status = player_status.drop_duplicates(subset=['PLAYER', 'TEAM', 'POS', 'WEEK'], keep='last')
+
+    # Anti-join, keep listed players without an entry in the dataframe on that week
+    existing = player_stats_summary[['PLAYER', 'WEEK']].astype(object).drop_duplicates()
+    dnp = player_status.merge(existing, on=['PLAYER', 'WEEK'], how='left', indicator=True)
+    dnp = dnp[dnp['_merge'] == 'left_only'].reset_index(drop=True)
+    if dnp.empty:
+        return player_stats_summary
+
+    assert dnp['TEAM'].isin(teams).all()
+    assert dnp['POS'].isin(positions).all()
+
+    new_entries = pd.DataFrame(get_row_for_out_bye(player_stats_summary.columns), index=dnp.index)
+    new_entries[['PLAYER', 'WEEK', 'TEAM', 'POS']] = dnp[['PLAYER', 'WEEK', 'TEAM', 'POS']]
+    new_entries['BYE'] = dnp['STATUS'].str.upper() == 'BYE'
+    new_entries['OUT'] = ~new_entries['BYE']
 
     return pd.concat([player_stats_summary, new_entries])
 def add_missing_player_rows(player_data, file_path_dict, include_team_pos_data=True):
     '''
-    Adds rows to player data for listed players missing values for certain weeks due to low point totals. Fills in stats with fill_value.
+    Adds rows to player data for listed players missing values for certain weeks due to low point totals. Fills in stats using get_row_for_missing.
     include_team_pos_data is a bool to include the players most recent team and position mapping on new entries. Returns dataframe.
     
     Args:
         player_data (pd.DataFrame): dataframe to add rows to
         file_path_dict (dict): dictionary with original file name as keys and file paths as values
-        include_team_pos_data (bool, optional): include team, pos data based on most recent player data, more performance intensive, default: True
+        include_team_pos_data (bool, optional): include team, pos and bye week data based on most recent player data, default: True
         
     Returns:
         pd.DataFrame: dataframe with added rows for missing players
     '''
     
-    if include_team_pos_data:
-        team_pos_map = import_nfl_team_pos_mappings(file_path_dict)
-    
-    # {team: {week: oppponent}}
-    nfl_schedule_dict = import_nfl_schedule_dict()
-
-    players = unique(player_data['PLAYER'])
-    weeks = unique(player_data['WEEK'])
-    players_dict = {}
-    # Create a tracker dictionary with all entries 
-    for player in players:
-        players_dict[player] = {weeks[0]: False}
-        for week in weeks[1:]:
-            players_dict[player][week] = False
-
-    # In players_dict mark off existing values
-    for index, row in player_data.iterrows():
-        players_dict[row['PLAYER']][row['WEEK']] = True        
-
-    # Create new entries for each key pair still False in players_dict
-    new_entries = pd.DataFrame(columns=player_data.columns)
-    ne_index = 0
-    for player, value1 in players_dict.items():
-        for week, value2 in value1.items():
-            if value2:
-                continue
-            else:
-                new_entries.loc[ne_index, 'PLAYER'] = player
-                new_entries.loc[ne_index, 'WEEK'] = week
-                if include_team_pos_data:
-                    new_entries.loc[ne_index, 'POS'] = team_pos_map[player][1]
-                    new_entries.loc[ne_index, 'TEAM'] = team_pos_map[player][0]
-                    if nfl_schedule_dict[team_pos_map[player][0]][week] == 'BYE':
-                        new_entries.loc[ne_index, 'BYE'] = True
-                ne_index += 1
+    # Every player x week pair, reindexed against the pairs in player_data to find the gaps
+    players = player_data['PLAYER'].astype(object).unique()
+    weeks = player_data['WEEK'].astype(object).unique()
+    all_pairs = pd.MultiIndex.from_product([players, weeks], names=['PLAYER', 'WEEK'])
+    listed_pairs = pd.MultiIndex.from_frame(player_data[['PLAYER', 'WEEK']].astype(object)).unique()
+    listed = pd.Series(True, index=listed_pairs).reindex(all_pairs, fill_value=False)
+    missing = listed.index[~listed.to_numpy()].to_frame(index=False)
+    if missing.empty:
+        return apply_player_data_schema(player_data.reset_index(drop=True))
 
+    new_entries = pd.DataFrame(get_row_for_missing(player_data.columns), index=missing.index)
+    new_entries[['PLAYER', 'WEEK']] = missing
+    if include_team_pos_data:
+        team_pos = get_latest_team_pos(player_data).reindex(missing['PLAYER'])
+        new_entries['TEAM'] = team_pos['TEAM'].to_numpy()
+        new_entries['POS'] = team_pos['POS'].to_numpy()
 
-    new_entries = new_entries.infer_objects(copy=False)
-    values_dict = get_row_for_missing(new_entries.columns)
-    for col in new_entries.columns:
-        new_entries[col].fillna(values_dict[col])
+        # {(TEAM, WEEK): OPPONENT}, free agents have no schedule and keep the fill values
+        schedule = import_nfl_schedule(file_path_dict).stack()
+        opponents = schedule.reindex(pd.MultiIndex.from_arrays([new_entries['TEAM'], new_entries['WEEK']])).to_numpy()
+        new_entries['OPPONENT'] = new_entries['OPPONENT'].astype(object).where(pd.isna(opponents), opponents)
+        new_entries['BYE'] = opponents == 'BYE'
 
     new_df = pd.concat([player_data, new_entries])
-    new_df = new_df.reset_index(drop=True)
+    new_df = apply_player_data_schema(new_df.reset_index(drop=True))
     return new_df
 
 # Direct file imports with formatting
-def import_player_data_from_file(player_data_file, sheet, players_cols):
+def import_sheets_from_file(data_file, selected_weeks, skiprows=None):
+    '''
+    Open an Excel workbook once and read every sheet in selected_weeks in a single pass. All columns are read so 
+    the player and stats halves of a sheet can be sliced from the same in-memory dataframe. Returns a dictionary.
+    
+    Args:
+        data_file (str): file path
+        selected_weeks (list): sheets to import
+        skiprows (int, optional): number of rows to skip at the top of each sheet. Default: None
+
+    Returns:
+        dict: {sheet: pd.DataFrame}
+    '''
+    raw_sheets = {}
+    with pd.ExcelFile(data_file) as workbook:
+        for sheet in selected_weeks:
+            raw_sheets[sheet] = workbook.parse(sheet_name=sheet, skiprows=skiprows)
+    return raw_sheets
+def import_weekly_data(file_key, selected_weeks, file_path_dict, parse_sheet, parse_args=(), skiprows=None, use_store=True, executor=None):
     '''
-    Import and manipulate the player half of the data from Excel. Return a dataframe of the player data from sheet.
+    Return one parsed dataframe per sheet in selected_weeks for the workbook at file_path_dict[file_key]. Weeks already in the 
+    season store with an unchanged sheet are read from their Parquet partition. Sheets that are new or modified since they were 
+    stored are read from the workbook in a single pass, parsed with parse_sheet(raw_sheet, sheet, *parse_args) and written to 
+    the store. With an executor, each of those sheets is read and parsed as its own job. Returns a list of dataframes in the 
+    order of selected_weeks.
     
     Args:
-        player_data_file (str): file path
+        file_key (str): key of the workbook in file_path_dict
+        selected_weeks (list): sheets to import
+        file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        parse_sheet (function): function that turns a raw sheet into a parsed dataframe
+        parse_args (tuple, optional): additional arguments passed to parse_sheet. Default: ()
+        skiprows (int, optional): number of rows to skip at the top of each sheet. Default: None
+        use_store (bool, optional): read and write the season store. Default: True
+        executor (ProcessPoolExecutor, optional): if included, sheets are parsed in parallel, one job per sheet. Default: None
+        
+    Returns:
+        list: parsed dataframes, one per week
+    '''
+    data_file = file_path_dict[file_key]
+    store_dir = get_season_store_dir(file_path_dict, use_store)
+    
+    weekly_data = {}
+    if store_dir:
+        manifest = read_store_manifest(store_dir)
+        stored_sheets = manifest['workbooks'].setdefault(file_key, {})
+        fingerprints = get_sheet_fingerprints(data_file, selected_weeks)
+        current_sheets = [sheet for sheet in selected_weeks if stored_sheets.get(sheet) == fingerprints[sheet]]
+        weekly_data = read_store_partitions(store_dir, file_key, current_sheets)
+    
+    sheets_to_parse = [sheet for sheet in selected_weeks if sheet not in weekly_data]
+    if sheets_to_parse and (executor is None):
+        raw_sheets = import_sheets_from_file(data_file, sheets_to_parse, skiprows)
+        for sheet in sheets_to_parse:
+            weekly_data[sheet] = parse_sheet(raw_sheets[sheet], sheet, *parse_args)
+    elif sheets_to_parse:
+        jobs = {}
+        for sheet in sheets_to_parse:
+            jobs[sheet] = executor.submit(import_and_parse_sheet, data_file, sheet, parse_sheet, parse_args, skiprows)
+        # Collect in sheet order so results do not depend on which job finishes first
+        for sheet in sheets_to_parse:
+            weekly_data[sheet] = jobs[sheet].result()
+
+    if store_dir and sheets_to_parse:
+        for sheet in sheets_to_parse:
+            if write_store_partition(store_dir, file_key, sheet, weekly_data[sheet]):
+                stored_sheets[sheet] = fingerprints[sheet]
+        write_store_manifest(store_dir, manifest)
+
+    return [weekly_data[sheet] for sheet in selected_weeks]
+def import_and_parse_sheet(data_file, sheet, parse_sheet, parse_args=(), skiprows=None):
+    '''
+    Read a single sheet from Excel and parse it with parse_sheet(raw_sheet, sheet, *parse_args). Used as the job run 
+    by each worker process in parallel imports, the workbook is opened once per worker with get_worker_workbook. Returns dataframe.
+    
+    Args:
+        data_file (str): file path
         sheet (str): sheet to import
-        player_cols (list): columns with player data
+        parse_sheet (function): function that turns a raw sheet into a parsed dataframe
+        parse_args (tuple, optional): additional arguments passed to parse_sheet. Default: ()
+        skiprows (int, optional): number of rows to skip at the top of the sheet. Default: None
+        
+    Returns:
+        pd.DataFrame: parsed sheet
+    '''
+    raw_sheet = get_worker_workbook(data_file).parse(sheet_name=sheet, skiprows=skiprows)
+    return parse_sheet(raw_sheet, sheet, *parse_args)
+def get_worker_workbook(data_file):
+    '''
+    Returns the workbook at data_file opened by this process. Opening a workbook loads its shared strings table, which costs 
+    more than parsing a sheet, so each worker process keeps its workbooks open for the life of the pool and only opens a 
+    workbook again if the file changes. Returns pd.ExcelFile.
+    
+    Args:
+        data_file (str): file path
+        
+    Returns:
+        pd.ExcelFile: open workbook
+    '''
+    global worker_workbooks
+    file_stats = os.stat(data_file)
+    file_state = (file_stats.st_mtime_ns, file_stats.st_size)
+    if data_file in worker_workbooks:
+        opened_state, workbook = worker_workbooks[data_file]
+        if opened_state == file_state:
+            return workbook
+        workbook.close()
+    workbook = pd.ExcelFile(data_file)
+    worker_workbooks[data_file] = (file_state, workbook)
+    return workbook
+def get_import_executor(workers=1):
+    '''
+    Returns a ProcessPoolExecutor with workers processes to use as a context manager in imports. For workers of 1 or less,
+    returns a context that yields None so sheets are parsed serially.
+    
+    Args:
+        workers (int, optional): number of processes. Default: 1
+        
+    Returns:
+        ProcessPoolExecutor or nullcontext: executor context
+    '''
+    if workers > 1:
+        return ProcessPoolExecutor(max_workers=workers)
+    return nullcontext()
+
+# Used in file imports
+def parse_player_stats_sheet(raw_sheet, sheet, players_cols, stats_cols, column_labels, type='Offense'):
+    '''
+    Parse a full player, kicker or defense sheet loaded from Excel. The player and stats halves are sliced from raw_sheet,
+    combined into one table and labeled with the week. Returns dataframe.
+    
+    Args:
+        raw_sheet (pd.DataFrame): sheet as read from Excel
+        sheet (str): sheet name, used for the WEEK column
+        players_cols (list): columns with player data
+        stats_cols (list): columns with stats data
+        column_labels (list): labels to give stats columns, post data manipulation
+        type (str, optional): type of file import, 'Offense', 'Defense', 'Kicker'. Default: 'Offense'
+        
+    Returns:
+        pd.DataFrame: dataframe with player and stats data for one week
+    '''
+    players = parse_player_data(raw_sheet.iloc[:, players_cols])
+    stats = parse_stats_data(raw_sheet.iloc[:, stats_cols], column_labels, type)
+    # Combine player and stats to one table
+    players_stats = pd.concat([players, stats], axis=1)
+    # Add column for week
+    players_stats['WEEK'] = sheet
+    return players_stats
+def parse_utilization_sheet(raw_sheet, sheet, util_cols):
+    '''
+    Parse a utilization sheet loaded from Excel and label it with the week. Returns dataframe.
+    
+    Args:
+        raw_sheet (pd.DataFrame): sheet as read from Excel
+        sheet (str): sheet name, used for the WEEK column
+        util_cols (list): columns with relevant data
+        
+    Returns:
+        pd.DataFrame: dataframe with utilization data for one week
+    '''
+    util_data = parse_utilization_data(raw_sheet.iloc[:, util_cols])
+    util_data['WEEK'] = sheet
+    return util_data
+def parse_player_status_sheet(raw_sheet, sheet, status_cols):
+    '''
+    Parse a player status sheet loaded from Excel and label it with the week. Returns dataframe.
+    
+    Args:
+        raw_sheet (pd.DataFrame): sheet as read from Excel
+        sheet (str): sheet name, used for the WEEK column
+        status_cols (list): columns with relevant data
+        
+    Returns:
+        pd.DataFrame: players who were out or on bye for one week
+    '''
+    data = raw_sheet.iloc[:, status_cols].copy()
+    data['WEEK'] = sheet
+    return data
+def parse_player_data(raw_players):
+    '''
+    Manipulate the player half of a sheet already loaded from Excel. Return a dataframe of the player data.
+    Each player is a three row chunk, rows are parsed for all chunks at once using the chunk start rows.
+    
+    Args:
+        raw_players (pd.DataFrame): player columns of the sheet
         
     Returns:
         pd.DataFrame: dataframe with player data
@@ -660,56 +914,128 @@ def import_player_data_from_file(player_data_file, sheet, players_cols):
     # Globals
     global filler_value
 
-    # Import
-    raw_players = pd.read_excel(player_data_file,sheet_name=sheet,usecols=players_cols)
-    raw_players['Unnamed: 5'] = raw_players['Unnamed: 5'].fillna(filler_value).astype(str)
-    
-    #print(raw_players.head())
-    # Initialize values
-    skip = True
-    player_data = []
-    loop_num = 0 # used in loop_num as the index value
-
-    while loop_num < len(raw_players): 
-        # Iterate loop_num if we are not currently on a row with player data
-        if (raw_players.iloc[loop_num, 5] == filler_value)|(raw_players.iloc[loop_num, 5] == 'proj') :
-            skip = True
-            while skip == True:
-                loop_num+=1
-                if loop_num >= len(raw_players):
-                    break
-                elif raw_players.iloc[(loop_num-1), 5] == 'proj':
-                    skip = False
+    proj_col = raw_players.iloc[:, 5].fillna(filler_value).astype(str)
+    starts = find_player_chunk_starts(proj_col)
+
+    # Chunk rows: name repeated twice, owner, opponent, final score and proj on the first row, 
+    # name with injury status on the second row, team and position on the third row
+    name_col = raw_players.iloc[:, 0].to_numpy()
+    team_ini, position = parse_out_teams_and_positions(name_col[starts+2])
+    owner_ini = raw_players.iloc[starts, 1].str.upper()
+    owner_ini = owner_ini.where(~owner_ini.str.contains('WA ', regex=False), 'FA')   # Set to FA if listed on waivers
+    opponent_ini = raw_players.iloc[starts, 3].str.upper().str.removeprefix('@')
+
+    players = pd.DataFrame({'PLAYER': parse_out_player_names(name_col[starts], name_col[starts+1]).tolist(), 
+                            'TEAM': team_ini.tolist(), 
+                            'POS': position.tolist(), 
+                            'OWNER': owner_ini.tolist(), 
+                            'OPPONENT': opponent_ini.tolist(), 
+                            'FINALSCORE': raw_players.iloc[starts, 4].tolist(), 
+                            'PROJ': proj_col.iloc[starts].tolist()})
+    return players
+def find_player_chunk_starts(proj_col):
+    '''
+    Find the first row of every player chunk using the proj column. Rows after a 'proj' header row start a run of three 
+    row player chunks, a run ends at the first chunk start position holding filler_value or another 'proj' header.
+    Returns array of row positions.
+    
+    Args:
+        proj_col (pd.Series): proj column of the player data with missing values set to filler_value
         
-        # Sanity check for index integrity
-        if loop_num+2 >= len(raw_players):
-            break
+    Returns:
+        np.ndarray: row positions of chunk starts
+    '''
+    global filler_value
+
+    proj_col = proj_col.reset_index(drop=True)
+    is_header = (proj_col == 'proj')
+    is_marker = is_header | (proj_col == filler_value)
+
+    # Runs of chunks start at the top of the sheet and on the row after each header
+    run = is_header.shift(1, fill_value=False).cumsum()
+    row_num = pd.Series(np.arange(len(proj_col)))
+    offset = row_num - row_num.groupby(run).transform('min')
+    is_candidate = (offset % 3 == 0)
+
+    # Once a chunk start position holds a marker, the rest of the run is skipped
+    run_ended = (is_candidate & is_marker).groupby(run).cummax()
+    is_start = is_candidate & ~run_ended & (row_num + 2 < len(proj_col))
+    return row_num[is_start].to_numpy()
+def parse_out_player_names(doubled_names, names):
+    '''
+    Vectorized parse_out_player_name. The first chunk row repeats the player name twice, the second row has the name 
+    followed by any injury status. The name is the second row up to the first character that differs from the first row.
+    Returns array of player names.
+    
+    Args:
+        doubled_names (np.ndarray): first row of each chunk
+        names (np.ndarray): second row of each chunk
         
-        #print('week: ',sheet,' loop_num: ',loop_num)
-        player_name, team_ini, position, owner_ini, opponent_ini, final_score, proj_pts = parse_player_chunk(raw_players, chunk_start_index=loop_num)
-        player_data.append([player_name, team_ini, position, owner_ini, opponent_ini, final_score, proj_pts])
-
-        # Jump to next player
-        loop_num += 3
-    players = pd.DataFrame(player_data, columns=['PLAYER', 'TEAM', 'POS', 'OWNER', 'OPPONENT', 'FINALSCORE', 'PROJ']).reset_index(drop=True)
-    #print('length players: ', len(players))
-    return players
-def import_stats_data_from_file(player_data_file, sheet, stats_cols, column_labels, type='Offense'):
+    Returns:
+        np.ndarray: parsed player names
+    '''
+    global inj_status
+
+    doubled_names = doubled_names.astype(str)
+    names = names.astype(str)
+    width = max(np.char.str_len(doubled_names).max(initial=1), np.char.str_len(names).max(initial=1))
+    # Compare as character codes, padded to the same width
+    doubled_codes = doubled_names.astype(f'U{width}').view(np.uint32).reshape(len(names), width)
+    name_codes = names.astype(f'U{width}').view(np.uint32).reshape(len(names), width)
+    name_lengths = np.char.str_len(names)
+    differs = (doubled_codes != name_codes) & (np.arange(width) < name_lengths[:, None])
+    first_diff = differs.argmax(axis=1)
+    # As in parse_out_player_name, a difference on the first character keeps the whole name
+    end_name_pos = np.where(differs.any(axis=1) & (first_diff > 0), first_diff, width)
+    # Blank out characters past end_name_pos, trailing blanks are dropped when converting back to strings
+    name_codes = np.where(np.arange(width) < end_name_pos[:, None], name_codes, 0).astype(np.uint32)
+    player_names = pd.Series(name_codes.view(f'U{width}').ravel(), dtype=object)
+
+    # Weird edge case for IR players, any players name ending in capital I, Q, D, with the exception of III will be stripped
+    strip_status = ~player_names.str.endswith('III')
+    for status in inj_status:
+        strip = strip_status & player_names.str.endswith(status[0])
+        player_names = player_names.where(~strip, player_names.str[:-1])
+    return player_names.to_numpy()
+def parse_out_teams_and_positions(team_pos):
+    '''
+    Vectorized parse_out_team_and_pos. Returns a tuple of arrays: (team_ini, position)
+    
+    Args:
+        team_pos (np.ndarray): third row of each chunk, team initials followed by position
+        
+    Returns:
+        tuple: (team_ini, position), parsed player teams and positions
+    '''
+    global positions
+    global na_val
+
+    team_pos = pd.Series(team_pos, dtype=object)
+    team_ini = pd.Series(na_val, index=team_pos.index, dtype=object)
+    position = pd.Series(na_val, index=team_pos.index, dtype=object)
+    for pos in positions:
+        is_pos = team_pos.str.endswith(pos)
+        position = position.where(~is_pos, pos)
+        team_ini = team_ini.where(~is_pos, team_pos.str[:-len(pos)].str.upper())
+
+    unparsed = team_pos[team_ini == na_val]
+    if not(unparsed.empty):
+        raise ValueError(f'Unable to parse out string: {unparsed.iloc[0]}')
+
+    return (team_ini.to_numpy(), position.to_numpy())
+def parse_stats_data(stats, column_labels, type='Offense'):
     '''
-    Import and manipulate the stats half of the data from Excel. Return a dataframe of the player data from sheet.
+    Manipulate the stats half of a sheet already loaded from Excel. Return a dataframe of the stats data.
     Type is to indicate the type of file: 'Offense', 'Kicker', 'Defense'
     
      Args:
-        player_data_file (str): file path
-        sheet (str): sheet to import
-        stats_cols (list): columns with stats data
+        stats (pd.DataFrame): stats columns of the sheet
         column_labels (list): labels to give columns, post data manipulation
         type (str, optional): type of file import, 'Offense', 'Defense', 'Kicker'. Default: 'Offense'
         
     Returns:
         pd.DataFrame: dataframe with stats data
     '''
-    stats = pd.read_excel(player_data_file,sheet_name=sheet,usecols=stats_cols)
     # Only manipulation on stats is to drop header rows
     if type == 'Offense':
         header_rows = stats[(stats['Passing'] == 'C/A') | (stats['Passing'] == 'Passing')]
@@ -719,30 +1045,26 @@ def import_stats_data_from_file(player_data_file, sheet, stats_cols, column_labe
     else:
         header_rows = stats[(stats['Team Defense / Special Teams'] == 'TD') | (stats['Team Defense / Special Teams'] == 'Team Defense / Special Teams')]
  
-    stats.drop(header_rows.index, inplace=True)
-    stats.dropna(inplace=True)
+    stats = stats.drop(header_rows.index)
+    stats = stats.dropna()
     stats = stats.reset_index(drop=True)
     stats.columns = column_labels
     #print('length stats: ', len(stats['FPTS']))
     #print(stats['C/A'].unique())
     return stats
-def import_utilization_data_from_file(utilization_data_file, sheet, util_cols):
+def parse_utilization_data(util_data):
     '''
-    Complete the import and format the data from Excel. Returns dataframe.
+    Format utilization data already loaded from Excel. Returns dataframe.
 
      Args:
-        utilization_data_file (str): file path
-        sheet (str): sheet to import
-        util_cols (list): columns with relevant data
+        util_data (pd.DataFrame): utilization columns of the sheet
         
     Returns:
         pd.DataFrame: dataframe with utilization data
     '''
-    util_data = pd.read_excel(utilization_data_file, sheet_name=sheet, usecols=util_cols, skiprows=1)
+    util_data = util_data.copy()
     util_data.columns = util_data.columns.str.upper()
     return util_data
-
-# Used in file imports
 def parse_out_player_name(raw_players, chunk_start_index):
     '''
     Takes raw player data from Excel files and an index value corresponding to the start of the player chunk.
@@ -858,7 +1180,542 @@ def parse_player_chunk(raw_players, chunk_start_index):
     proj_pts = raw_players.iloc[chunk_start_index,5]
     return (player_name, team_ini, position, owner_ini, opponent_ini, final_score, proj_pts)
 
+# Season store
+def ingest_season_data(file_path_dict, selected_weeks='all_valid', workers=1):
+    '''
+    Bring the season store up to date with the weekly workbooks. Only sheets that are new or were modified since they were
+    last stored are parsed, everything else is left as is. Imports read from the store afterwards without touching Excel
+    for unchanged weeks. Returns a list of the (file_key, sheet) pairs that were parsed.
+    
+    Args:
+        file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        selected_weeks (str or list, optional): weeks to ingest. 'all' for all weeks, 'all_valid' for previous weeks. 
+            Otherwise a string or list of strings like 'WK1', 'WK2', etc. Default: 'all_valid'
+        workers (int, optional): number of processes used to parse sheets in parallel, 1 parses sheets serially. Default: 1
+
+    Returns:
+        list: [(file_key, sheet)] parsed during this ingest
+    '''
+    store_dir = get_season_store_dir(file_path_dict)
+    if not(store_dir):
+        raise ValueError('Season store requires pyarrow and a season_store entry in file_path_dict.')
+    before = read_store_manifest(store_dir)['workbooks']
+
+    with get_import_executor(workers) as executor:
+        import_player_data(selected_weeks, file_path_dict, w_dnp_info=False, executor=executor)
+        import_kicker_data(selected_weeks, file_path_dict, executor=executor)
+        import_defense_data(selected_weeks, file_path_dict, executor=executor)
+        import_utilization_data(selected_weeks, file_path_dict, executor=executor)
+        import_player_status(selected_weeks, file_path_dict, executor=executor)
+
+    after = read_store_manifest(store_dir)['workbooks']
+    ingested = []
+    for file_key, sheets in after.items():
+        for sheet, fingerprint in sheets.items():
+            if before.get(file_key, {}).get(sheet) != fingerprint:
+                ingested.append((file_key, sheet))
+    return ingested
+def get_season_store_dir(file_path_dict, use_store=True):
+    '''
+    Returns the season store directory from file_path_dict, creating it if needed. Returns False if the store is turned off, 
+    no store directory is listed or the Parquet engine (pyarrow) is not installed.
+    
+    Args:
+        file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        use_store (bool, optional): set to False to turn off the store. Default: True
+
+    Returns:
+        str or bool: store directory or False
+    '''
+    if not(use_store) or (pyarrow is None) or ('season_store' not in file_path_dict):
+        return False
+    store_dir = file_path_dict['season_store']
+    os.makedirs(store_dir, exist_ok=True)
+    return store_dir
+def get_season_store_version(file_path_dict):
+    '''
+    Returns the version of the season store, a hash of every stored sheet fingerprint. The version changes whenever a week 
+    is added or modified, so it can be used to key anything computed from the season data. Returns None without a store.
+    
+    Args:
+        file_path_dict (dict): dictionary with original file name as keys and file paths as values
+
+    Returns:
+        str or None: season store version
+    '''
+    store_dir = get_season_store_dir(file_path_dict)
+    if not(store_dir):
+        return None
+    return read_store_manifest(store_dir)['version']
+def get_season_fingerprint(file_path_dict, file_keys, selected_weeks='all_valid'):
+    '''
+    Returns a hash of the sheet fingerprints for the workbooks in file_keys. The hash changes as soon as one of those sheets 
+    is added or modified, so it can key anything computed from them. Unlike the store version it does not need the season 
+    store and does not wait for the next import to notice a change.
+    
+    Args:
+        file_path_dict (dict): dictionary with original file name as keys and file paths as values
+        file_keys (list): keys in file_path_dict of the workbooks to include
+        selected_weeks (str or list, optional): weeks to include. 'all' for all weeks, 'all_valid' for previous weeks. 
+            Otherwise a string or list of strings like 'WK1', 'WK2', etc. Default: 'all_valid'
+
+    Returns:
+        str: season fingerprint
+    '''
+    selected_weeks = convert_selected_weeks_input(selected_weeks)
+    fingerprints = {}
+    for file_key in file_keys:
+        data_file = file_path_dict[file_key]
+        fingerprints[file_key] = [data_file, get_sheet_fingerprints(data_file, selected_weeks)]
+    return hashlib.sha1(json.dumps(fingerprints, sort_keys=True).encode()).hexdigest()
+def get_sheet_fingerprints(data_file, selected_weeks):
+    '''
+    Returns a fingerprint of each sheet in selected_weeks without parsing the workbook. An xlsx file is a zip archive with one 
+    XML part per sheet, the fingerprint is the CRC and size of the sheet's part read from the archive directory. Cell text is 
+    stored once for the whole workbook in the shared strings part and number formats in the styles part, so their CRCs are 
+    part of every sheet's fingerprint. Editing the values of one sheet only changes that sheet's fingerprint, editing text 
+    changes them all. Other files fall back to the file's modification time and size.
+    
+    Args:
+        data_file (str): workbook file path
+        selected_weeks (list): sheets to fingerprint
+
+    Returns:
+        dict: {sheet: fingerprint}
+    '''
+    global store_version
+    if not(zipfile.is_zipfile(data_file)):
+        file_stats = os.stat(data_file)
+        return {sheet: f'{store_version}-{file_stats.st_mtime_ns}-{file_stats.st_size}' for sheet in selected_weeks}
+
+    main_ns = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    rel_ns = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+    shared_types = ('/sharedStrings', '/styles')
+    with zipfile.ZipFile(data_file) as workbook:
+        # Sheet name -> relationship id -> XML part
+        targets = {}
+        shared_parts = []
+        for rel in ET.fromstring(workbook.read('xl/_rels/workbook.xml.rels')):
+            target = rel.get('Target')
+            targets[rel.get('Id')] = target[1:] if target.startswith('/') else 'xl/' + target
+            if rel.get('Type').endswith(shared_types):
+                shared_parts.append(targets[rel.get('Id')])
+        sheet_parts = {}
+        for sheet in ET.fromstring(workbook.read('xl/workbook.xml')).iter(main_ns + 'sheet'):
+            sheet_parts[sheet.get('name')] = targets[sheet.get(rel_ns + 'id')]
+        shared = '-'.join(f'{workbook.getinfo(part).CRC:08x}' for part in sorted(shared_parts))
+
+        fingerprints = {}
+        for sheet in selected_weeks:
+            info = workbook.getinfo(sheet_parts[sheet])
+            fingerprints[sheet] = f'{store_version}-{info.CRC:08x}-{info.file_size}-{shared}'
+    return fingerprints
+def read_store_manifest(store_dir):
+    '''
+    Read the season store manifest, which lists the fingerprint of every stored sheet by workbook. Returns dictionary.
+    
+    Args:
+        store_dir (str): season store directory
+
+    Returns:
+        dict: {'version': version, 'workbooks': {file_key: {sheet: fingerprint}}}
+    '''
+    manifest_file = os.path.join(store_dir, 'manifest.json')
+    if not(os.path.exists(manifest_file)):
+        return {'version': None, 'workbooks': {}}
+    with open(manifest_file) as file:
+        return json.load(file)
+def write_store_manifest(store_dir, manifest):
+    '''
+    Update the version of the season store manifest and write it to the store.
+    
+    Args:
+        store_dir (str): season store directory
+        manifest (dict): output of read_store_manifest with updated fingerprints
+    '''
+    manifest['version'] = hashlib.sha1(json.dumps(manifest['workbooks'], sort_keys=True).encode()).hexdigest()[:16]
+    manifest_file = os.path.join(store_dir, 'manifest.json')
+    # Write to a temporary file first so a failed write never leaves a partial manifest
+    with open(manifest_file + '.tmp', 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(manifest_file + '.tmp', manifest_file)
+def read_store_partitions(store_dir, file_key, selected_weeks):
+    '''
+    Read the stored partitions of a workbook for the weeks in selected_weeks. Returns dictionary.
+    
+    Args:
+        store_dir (str): season store directory
+        file_key (str): key of the workbook in file_path_dict
+        selected_weeks (list): sheets to read
+
+    Returns:
+        dict: {sheet: pd.DataFrame}
+    '''
+    weekly_data = {}
+    for sheet in selected_weeks:
+        partition_file = os.path.join(store_dir, file_key, f'{sheet}.parquet')
+        if os.path.exists(partition_file):
+            weekly_data[sheet] = decode_object_columns(pd.read_parquet(partition_file))
+    return weekly_data
+def write_store_partition(store_dir, file_key, sheet, data):
+    '''
+    Write a parsed sheet to its partition in the season store. Returns True if the partition was written.
+    
+    Args:
+        store_dir (str): season store directory
+        file_key (str): key of the workbook in file_path_dict
+        sheet (str): sheet name
+        data (pd.DataFrame): parsed sheet
+
+    Returns:
+        bool: True if written, False if the data can not be stored
+    '''
+    try:
+        encoded = encode_object_columns(data)
+    except ValueError:
+        return False    # Sheet is parsed from Excel again next time
+    os.makedirs(os.path.join(store_dir, file_key), exist_ok=True)
+    encoded.to_parquet(os.path.join(store_dir, file_key, f'{sheet}.parquet'))
+    return True
+def encode_object_columns(data):
+    '''
+    Parquet columns hold a single type, but parsed sheets mix strings like na_val with numbers in the same column. 
+    Stores each value of an object column as a 'type:value' string so it can be restored exactly. Returns dataframe.
+    
+    Args:
+        data (pd.DataFrame): dataframe to encode
+
+    Returns:
+        pd.DataFrame: dataframe with encoded object columns
+    '''
+    global store_decoders
+    data = data.copy()
+    for col in data.columns[data.dtypes == object]:
+        if not(data[col].map(lambda value: type(value).__name__ in store_decoders).all()):
+            raise ValueError(f'Column {col} has values that can not be stored in the season store.')
+        data[col] = data[col].map(lambda value: f'{type(value).__name__}:{value}')
+    return data
+def decode_object_columns(data):
+    '''
+    Reverses encode_object_columns. Returns dataframe.
+    
+    Args:
+        data (pd.DataFrame): dataframe read from the season store
+
+    Returns:
+        pd.DataFrame: dataframe with original object column values
+    '''
+    global store_decoders
+    for col in data.columns[data.dtypes == object]:
+        data[col] = data[col].map(lambda value: store_decoders[value[:value.index(':')]](value[value.index(':')+1:])).astype(object)
+    return data
+
+# Column types
+def apply_player_data_schema(data):
+    '''
+    Converts player data to compact column types. Repeated labels like PLAYER or TEAM become categoricals, OUT and BYE become bool, 
+    and numeric stats become float32 with NaN in place of na_val. Text columns like 'C/A' or 'FINALSCORE' are left as is. 
+    Safe to call on data that has already been converted. Returns dataframe.
+    
+    Args:
+        data (pd.DataFrame): player data to convert
+
+    Returns:
+        pd.DataFrame: player data with compact column types
+    '''
+    global category_columns
+    global bool_columns
+    global na_val
+    data = data.copy()
+    for col in data.columns:
+        values = data[col]
+        if col in category_columns:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                data[col] = values.astype('category')
+            continue
+        if col in bool_columns:
+            data[col] = values.eq(True)
+            continue
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        if pd.api.types.is_bool_dtype(values):
+            continue
+        if pd.api.types.is_numeric_dtype(values):
+            data[col] = values.astype('float32')
+        elif values.dtype == object:
+            # Only convert when every value is a number or missing
+            missing = values.isna() | (values == na_val)
+            numeric = pd.to_numeric(values.mask(missing), errors='coerce')
+            if (numeric.notna() | missing).all():
+                data[col] = numeric.astype('float32')
+    return data
+def format_for_display(data):
+    '''
+    Returns a copy of player data for printing or exporting, with categoricals as plain values and missing stats shown as na_val.
+    
+    Args:
+        data (pd.DataFrame): player data to format
+
+    Returns:
+        pd.DataFrame: player data formatted for display
+    '''
+    global na_val
+    display = data.copy()
+    for col in display.columns:
+        if isinstance(display[col].dtype, pd.CategoricalDtype) or pd.api.types.is_float_dtype(display[col]):
+            display[col] = display[col].astype(object).where(display[col].notna(), na_val)
+    return display
+
+# Opponent aggregates
+class OppStatCube:
+    '''
+    Stats summed by opponent x position x week, with cumulative sums along the weeks. The total or average of a stat 
+    against an opponent over any window of weeks is the difference of two prefix sums, taken for every opponent and 
+    position at once. Windows are given as (start, end) positions in weeks with end exclusive, like a slice. Averages 
+    are per week with data, weeks an opponent did not face a position do not count.
+
+    Args:
+        player_data (pd.DataFrame): player data with OPPONENT, POS, WEEK and stat columns
+        stats (list): stats to sum
+        weeks (list, optional): weeks along the week axis, in order. Default: valid_sheet_names
+    '''
+    def __init__(self, player_data, stats, weeks=None):
+        global valid_sheet_names
+        if weeks is None:
+            weeks = valid_sheet_names
+        self.weeks = list(weeks)
+        self.stats = list(stats)
+
+        data = player_data[player_data['WEEK'].isin(self.weeks) & player_data['OPPONENT'].notna()]
+        opp_codes, opponents = pd.factorize(data['OPPONENT'].astype(object), sort=True)
+        pos_codes, positions = pd.factorize(data['POS'].astype(object), sort=True)
+        week_codes = pd.Categorical(data['WEEK'].astype(object), categories=self.weeks).codes
+        self.opponents = list(opponents)
+        self.positions = list(positions)
+        self.opp_lookup = {opponent: num for num, opponent in enumerate(self.opponents)}
+        self.pos_lookup = {pos: num for num, pos in enumerate(self.positions)}
+
+        # Sum each stat into its (opponent, position, week) cell, missing stats count as zero
+        shape = (len(self.opponents), len(self.positions), len(self.weeks))
+        cells = np.ravel_multi_index((opp_codes, pos_codes, week_codes), shape)
+        size = int(np.prod(shape))
+        values = np.nan_to_num(data[self.stats].to_numpy(dtype=float))
+        sums = np.zeros((size, len(self.stats)))
+        for num in range(len(self.stats)):
+            sums[:, num] = np.bincount(cells, weights=values[:, num], minlength=size)
+        self.sums = sums.reshape(shape + (len(self.stats),))
+        self.counts = np.bincount(cells, minlength=size).reshape(shape)
+
+        # Prefix sums along the week axis with a leading zero week
+        self.prefix_sums = np.zeros((shape[0], shape[1], shape[2]+1, len(self.stats)))
+        self.prefix_sums[:, :, 1:] = np.cumsum(self.sums, axis=2)
+        self.prefix_weeks = np.zeros((shape[0], shape[1], shape[2]+1), dtype=int)
+        self.prefix_weeks[:, :, 1:] = np.cumsum(self.counts > 0, axis=2)
+    def week_bounds(self, weeks):
+        '''
+        Returns the (start, end) window covering the first through the last of weeks.
+        
+        Args:
+            weeks (list): weeks in the window
+
+        Returns:
+            tuple: (start, end)
+        '''
+        week_nums = [self.weeks.index(week) for week in weeks]
+        return (min(week_nums), max(week_nums)+1)
+    def window_totals(self, start, end, stat=None):
+        '''
+        Returns the stat totals over weeks[start:end] as an array [opponent, position], or [opponent, position, stat] for a list of stats.
+        
+        Args:
+            start (int): first week position in the window
+            end (int): week position after the window
+            stat (str or list, optional): stat or list of stats to return, all stats if not included. Default: None
+
+        Returns:
+            np.ndarray: window totals
+        '''
+        totals = self.prefix_sums[:, :, end] - self.prefix_sums[:, :, start]
+        if stat is None:
+            return totals
+        if isinstance(stat, str):
+            return totals[:, :, self.stats.index(stat)]
+        return totals[:, :, [self.stats.index(value) for value in stat]]
+    def window_weeks(self, start, end):
+        '''
+        Returns the number of weeks with data over weeks[start:end] as an array [opponent, position].
+        
+        Args:
+            start (int): first week position in the window
+            end (int): week position after the window
+
+        Returns:
+            np.ndarray: weeks with data
+        '''
+        return self.prefix_weeks[:, :, end] - self.prefix_weeks[:, :, start]
+    def window_average(self, start, end, stat=None):
+        '''
+        Returns the stat totals over weeks[start:end] divided by the weeks with data, NaN where there are none. Shaped like window_totals.
+        
+        Args:
+            start (int): first week position in the window
+            end (int): week position after the window
+            stat (str or list, optional): stat or list of stats to return, all stats if not included. Default: None
+
+        Returns:
+            np.ndarray: window averages
+        '''
+        totals = self.window_totals(start, end, stat)
+        weeks_with_data = self.window_weeks(start, end).astype(float)
+        weeks_with_data[weeks_with_data == 0] = np.nan
+        if not(isinstance(stat, str)):
+            weeks_with_data = weeks_with_data[:, :, np.newaxis]
+        return totals / weeks_with_data
+    def lookup(self, values, opponents, positions):
+        '''
+        Picks values for each (opponent, position) pair out of an array from one of the window methods. Pairs not in the cube are NaN.
+        
+        Args:
+            values (np.ndarray): output of window_totals, window_weeks or window_average
+            opponents (list-like): opponent of each pair
+            positions (list-like): position of each pair
+
+        Returns:
+            np.ndarray: one value (or row of stats) per pair
+        '''
+        opp_nums = np.array([self.opp_lookup.get(opponent, -1) for opponent in opponents], dtype=int)
+        pos_nums = np.array([self.pos_lookup.get(pos, -1) for pos in positions], dtype=int)
+        found = (opp_nums >= 0) & (pos_nums >= 0)
+        picked = np.full((len(opp_nums),) + values.shape[2:], np.nan)
+        picked[found] = values[opp_nums[found], pos_nums[found]]
+        return picked
+    def to_frame(self, values, stats=None):
+        '''
+        Returns an array from one of the window methods as a dataframe indexed by (OPPONENT, POS) with one column per stat.
+        
+        Args:
+            values (np.ndarray): [opponent, position, stat] array
+            stats (list, optional): stats along the last axis of values, if not all stats in the cube. Default: None
+
+        Returns:
+            pd.DataFrame: values by opponent and position
+        '''
+        if stats is None:
+            stats = self.stats
+        index = pd.MultiIndex.from_product([self.opponents, self.positions], names=['OPPONENT', 'POS'])
+        return pd.DataFrame(values.reshape(-1, len(stats)), index=index, columns=list(stats))
+
+class DefFactorTable(Mapping):
+    '''
+    Defense factors by opponent x position x stat in a dense array, NaN for opponent and position pairs without data.
+    def_factor(opp, pos) = ((stat(opp, pos) - min(stat(pos))) / (mean(stat(pos)) - min(stat(pos)))) - 1, or 0 where the 
+    mean is 0. The table also reads like the nested dictionary {OPPONENT: {POS: {STAT: factor}}}, so 
+    table[opponent][pos][stat] and table.items() work as before.
+
+    Args:
+        opp_stats (pd.DataFrame): OPPONENT, POS and stat columns, one row per opponent and position
+        stats (list): stats to calculate factors for
+    '''
+    def __init__(self, opp_stats, stats):
+        global positions
+        self.stats = list(stats)
+        self.positions = list(positions)
+        opp_codes, opponents = pd.factorize(opp_stats['OPPONENT'].astype(object))
+        pos_codes = np.array([self.positions.index(pos) for pos in opp_stats['POS'].astype(object)], dtype=int)
+        self.opponents = list(opponents)
+        self.opp_lookup = {opponent: num for num, opponent in enumerate(self.opponents)}
+        self.pos_lookup = {pos: num for num, pos in enumerate(self.positions)}
+
+        values = opp_stats[self.stats].to_numpy(dtype=float)
+        position_stats = opp_stats.groupby(opp_stats['POS'].astype(object))[self.stats].agg(['mean', 'min'])
+        position_stats = position_stats.reindex(self.positions)
+        means = position_stats.xs('mean', axis=1, level=1).to_numpy()[pos_codes]
+        mins = position_stats.xs('min', axis=1, level=1).to_numpy()[pos_codes]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factors = np.where(means == 0, 0.0, ((values - mins) / (means - mins)) - 1)
+
+        self.factors = np.full((len(self.opponents), len(self.positions), len(self.stats)), np.nan)
+        self.factors[opp_codes, pos_codes] = factors
+    @classmethod
+    def from_dict(cls, def_factor_dict, stats):
+        '''
+        Builds a table from a nested dictionary {OPPONENT: {POS: {STAT: factor}}}, factors are used as given.
+        
+        Args:
+            def_factor_dict (dict): {OPPONENT: {POS: {STAT: factor}}}
+            stats (list): stats to keep
+
+        Returns:
+            DefFactorTable: table of the factors in def_factor_dict
+        '''
+        rows = [(opponent, pos) for opponent, pos_factors in def_factor_dict.items() for pos in pos_factors]
+        table = cls(pd.DataFrame(rows, columns=['OPPONENT', 'POS']).assign(**{stat: 0.0 for stat in stats}), stats)
+        for opponent, pos_factors in def_factor_dict.items():
+            for pos, factors in pos_factors.items():
+                table.factors[table.opp_lookup[opponent], table.pos_lookup[pos]] = [factors[stat] for stat in table.stats]
+        return table
+    def lookup(self, opponents, positions, stats=None):
+        '''
+        Returns the factors of each (opponent, position) pair as an array [pair, stat]. Pairs not in the table are NaN.
+        
+        Args:
+            opponents (list-like): opponent of each pair
+            positions (list-like): position of each pair
+            stats (list, optional): stats to return, all stats if not included. Default: None
+
+        Returns:
+            np.ndarray: factors
+        '''
+        opp_nums = np.array([self.opp_lookup.get(opponent, -1) for opponent in opponents], dtype=int)
+        pos_nums = np.array([self.pos_lookup.get(pos, -1) for pos in positions], dtype=int)
+        found = (opp_nums >= 0) & (pos_nums >= 0)
+        factors = self.factors
+        if stats is not None:
+            factors = factors[:, :, [self.stats.index(stat) for stat in stats]]
+        picked = np.full((len(opp_nums), factors.shape[2]), np.nan)
+        picked[found] = factors[opp_nums[found], pos_nums[found]]
+        return picked
+    def zero_sum_check(self, tolerance=0.00001):
+        '''
+        Factors of a position and stat sum to ~0 across opponents. Returns bool array [position, stat], True where the 
+        sum is within tolerance, positions without data pass.
+        
+        Args:
+            tolerance (float, optional): largest allowed absolute sum. Default: 0.00001
+
+        Returns:
+            np.ndarray: check by position and stat
+        '''
+        sums = np.nansum(self.factors, axis=0)
+        return (sums < tolerance) & (sums > -tolerance)
+    def __getitem__(self, opponent):
+        opp_num = self.opp_lookup[opponent]
+        pos_factors = {}
+        for pos_num, pos in enumerate(self.positions):
+            if not(np.isnan(self.factors[opp_num, pos_num]).all()):
+                pos_factors[pos] = dict(zip(self.stats, self.factors[opp_num, pos_num].tolist()))
+        return pos_factors
+    def __iter__(self):
+        return iter(self.opponents)
+    def __len__(self):
+        return len(self.opponents)
+
 # Utility functions
+def split_made_attempted(made_att_col, dnp):
+    '''
+    Splits a column of 'made/attempted' strings like '2/3' into two integer columns. Rows where dnp is True 
+    are set to missing. Returns a tuple of pandas Series: (made, attempted)
+
+    Args:
+        made_att_col (pd.Series): column of 'made/attempted' values
+        dnp (pd.Series): bool column, True where the player did not play
+
+    Returns:
+        tuple: (made, attempted), nullable integer columns
+    '''
+    split = made_att_col.astype(str).str.extract(r'^(\d+)/(\d+)$')
+    split = split.apply(pd.to_numeric).astype('Int64').mask(dnp)
+    return (split[0], split[1])
 def convert_team_ini_to_standard(team_ini_col):
     '''
     Converts any non-standard team ini values to standard array below. Returns a pandas Series. 
@@ -875,13 +1732,15 @@ def convert_team_ini_to_standard(team_ini_col):
     for num, val in enumerate(team_ini_col):
         if val not in standard_array:
             #print(num," ",val)  #***
-            if val == 'JAX':
+            if len(val) > 3:
+                val = val[:3]   # Team listed with a second position like 'JAXWR, '
+            if val in standard_array:
+                new_val = val
+            elif val == 'JAX':
                 #print(num)
                 new_val = 'JAC'
             elif val == 'WSH':
                 new_val = 'WAS'
-            elif len(val) > 3:
-                new_val = val[:3]
             elif val == '--':
                 new_val = 'FA'
             else:
@@ -932,11 +1791,8 @@ def unique(list):
     Returns:
         list: list of unique values
     '''
-    unique_list = []
-    for x in list:
-        # check if exists in unique_list or not
-        if x not in unique_list:
-            unique_list.append(x)
+    # dict keys keep insertion order, so this is the order of first appearance
+    unique_list = [x for x in dict.fromkeys(list)]
     return unique_list
 
 # Slicing player data
@@ -1035,10 +1891,7 @@ def add_FPTS_CLASS(data):
         pd.DataFrame: dataframe with added column
     
     '''
-    global na_val
-
-    data.loc[data['FPTS'] == na_val, 'FPTS'] = 0
-    data['FPTS'] = data['FPTS'].astype(float)
+    data['FPTS'] = data['FPTS'].fillna(0)
     data['FPTS_CLASS'] = pd.cut(data['FPTS'], bins=[-20, 10, 15, 20, 25, 100], right=False, labels=[0, 1, 2, 3, 4])
     #print(data[data['PLAYER']=='Colts D/ST'])    
     data['FPTS_CLASS'] = data['FPTS_CLASS'].astype(int)
@@ -1063,19 +1916,17 @@ def add_OWNER(data, file_path_dict, owners_for_manual_correction=False, pull_map
     else: 
         map_dict = import_recent_roster_mappings(owners_for_manual_correction, file_path_dict)
     
-    
-    for index, row in data.iterrows():
-
-        if row['PLAYER'] in map_dict.keys():
-            data.loc[index, 'OWNER'] = map_dict[row['PLAYER']]
-        else:
-            data.loc[index, 'OWNER'] = 'FA'
+    data['OWNER'] = data['PLAYER'].astype(object).map(map_dict).fillna('FA').astype('category')
     return data
-def add_STARTER_and_STARTPOS(data, value_cols=['FPTS_CLASS', 'FPTS'], start_by_pos={'QB': 1, 'RB': 2, 'WR': 2, 'TE': 1, 'FLEX': 1, 'K': 1, 'D/ST': 1}, flex_positions=['RB', 'WR', 'TE'], debug_mode=False):
+def add_STARTER_and_STARTPOS(data, value_cols=['FPTS_CLASS', 'FPTS'], start_by_pos={'QB': 1, 'RB': 2, 'WR': 2, 'TE': 1, 'FLEX': 1, 'K': 1, 'D/ST': 1}, flex_positions=['RB', 'WR', 'TE'], debug_mode=False, lineup_by=['OWNER']):
     '''
     Takes in a dataframe where 'PLAYER' values are unique and 'OWNER' values have been added and adds columns for 'STARTER' (boolean) and
     'STARTPOS' indicating RB1, WR2, FLEX, etc. based on 'FPTS_CLASS' and 'FPTS' columns. value_cols is a list of player values to sort by,
-    higher values are better. Returns dataframe with additional columns
+    higher values are better. Every lineup is filled at once: players are ranked within each (lineup, POS) group, the top ranks start at 
+    their position and FLEX goes to the best remaining flex_positions players. A position is left empty if an owner has fewer players 
+    than its starting spots. lineup_by sets the columns of one lineup, like ['OWNER', 'WEEK'] for data with a row per player and week 
+    (player values are then unique within each week). Rows with na_val in any lineup_by column are not in a lineup. Returns 
+    dataframe with additional columns
     
     Args:
         data (pd.DataFrame): dataframe to add columns to
@@ -1083,63 +1934,51 @@ def add_STARTER_and_STARTPOS(data, value_cols=['FPTS_CLASS', 'FPTS'], start_by_p
         start_by_pos (dictionary, optional): keys = positions, values = number to start. Default: {'QB': 1, 'RB': 2, 'WR': 2, 'TE': 1, 'FLEX': 1, 'K': 1, 'D/ST': 1}
         flex_positions (list, optional): list of positions considered for FLEX. Default: ['RB', 'WR', 'TE']
         debug_mode (bool, optional): more verbose output used for debugging. Default: False
+        lineup_by (list, optional): columns identifying a lineup. Default: ['OWNER']
 
     Returns:
         pd.DataFrame: dataframe with added columns
     
     '''
-    
-    owners = data['OWNER'].unique()
-
-    ascending = []
-    for val in value_cols:
-        ascending.append(False)
+    global na_val
 
-    for owner in owners:
-        # Skip players not on teams
-        if debug_mode:
-            print(owner)
-        if owner == na_val:
+    # Best players first, ties keep their order in data
+    ranked = data[lineup_by + ['POS'] + value_cols].reset_index(drop=True)
+    ranked = ranked[(ranked[lineup_by].astype(object) != na_val).all(axis=1)]    # Skip players not in a lineup, like players not on teams
+    ranked = ranked.sort_values(by=value_cols, ascending=False, kind='stable')
+    pos_groups = ranked.groupby(lineup_by + ['POS'], observed=True, sort=False)
+    pos_rank = pos_groups.cumcount().to_numpy()
+    pos_count = pos_groups['POS'].transform('size').to_numpy()
+    row_pos = ranked['POS'].astype(object).to_numpy()
+    row_nums = ranked.index.to_numpy()
+
+    starter = np.zeros(len(data), dtype=bool)
+    start_pos = np.full(len(data), na_val, dtype=object)
+    for pos, value in start_by_pos.items():
+        # key is pos, value is number to start
+        if pos == 'FLEX':
             continue
-        subset = data.loc[data['OWNER'] == owner]
-        for key, value in start_by_pos.items():
-            # key is pos, value is number to start
-            if key == 'FLEX':
-                pos_subset = data.loc[(data['POS'].isin(flex_positions)) & (data['STARTER'] != True) & (data['OWNER'] == owner)]     # This only works if flex is the last listed start_by_pos
-                if pos_subset.empty:
-                    continue        # This condition causes an error, it is normal for an owner to not have a starting player due to future bye weeks
-                pos_subset_sorted = pos_subset.sort_values(by=value_cols, ascending=ascending).reset_index()
-                #print(pos_subset_sorted)
-                for i in range(value):
-                    if debug_mode:
-                        print('key: ',key,' i: ',i,' value: ',value)
-                    index_val = pos_subset_sorted.loc[i, 'index']
-                    data.loc[index_val, 'STARTER'] = True
-                    data.loc[index_val, 'STARTPOS'] = key
-            else:
-                pos_subset = subset.loc[subset['POS'] == key]
-                #if pos_subset.empty:
-                #    continue        # This condition causes an error, it is normal for an owner to not have a starting player due to future bye weeks
-                if len(pos_subset['PLAYER']) < value:
-                    continue       # This condition causes an error, it is normal for an owner to not have a starting player due to future bye weeks
-
-                pos_subset_sorted = pos_subset.sort_values(by=value_cols, ascending=ascending).reset_index()
-                #print(pos_subset_sorted)
-                for i in range(value):
-                    if debug_mode:
-                        print('key: ',key,' i: ',i,' value: ',value)
-                    index_val = pos_subset_sorted.loc[i, 'index']
-                    data.loc[index_val, 'STARTER'] = True
-                    if value > 1:
-                        start_pos = key + str(i+1)
-                    else: 
-                        start_pos = key
-                    data.loc[index_val, 'STARTPOS'] = start_pos
-    
-    # Fill in everything else
-    data.loc[data[data['STARTER'].isna()].index, 'STARTER'] = False
-    data.loc[data[data['STARTPOS'].isna()].index, 'STARTPOS'] = na_val
-    
+        chosen = (row_pos == pos) & (pos_rank < value) & (pos_count >= value)
+        starter[row_nums[chosen]] = True
+        if value > 1:
+            start_pos[row_nums[chosen]] = [pos + str(int(rank)+1) for rank in pos_rank[chosen]]
+        else:
+            start_pos[row_nums[chosen]] = pos
+        if debug_mode:
+            print(pos, ': ', chosen.sum(), ' starters')
+
+    # FLEX from the flex_positions players left after the other positions are filled
+    if 'FLEX' in start_by_pos:
+        remaining = ranked[ranked['POS'].isin(flex_positions) & ~starter[row_nums]]
+        flex_rank = remaining.groupby(lineup_by, observed=True, sort=False).cumcount().to_numpy()
+        chosen = remaining.index.to_numpy()[flex_rank < start_by_pos['FLEX']]
+        starter[chosen] = True
+        start_pos[chosen] = 'FLEX'
+        if debug_mode:
+            print('FLEX: ', len(chosen), ' starters')
+
+    data['STARTER'] = starter
+    data['STARTPOS'] = start_pos
     return data
 
 # Functions for dnp and missing handling
@@ -1,60 +1,435 @@
+import os
+import time
+import joblib
 import pandas as pd
 import numpy as np
-import fantasy_football.ffl_create_features as fcf
-from sklearn.model_selection import train_test_split, GridSearchCV
+import ffl_data_importing as fdi
+import ffl_create_features as fcf
+from sklearn.model_selection import train_test_split, cross_validate, GridSearchCV, RandomizedSearchCV
+from sklearn.pipeline import Pipeline
+from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler
 #from sklearn.linear_model import LinearRegression, Lasso, Ridge
 from sklearn.metrics import root_mean_squared_error
-from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 
 
-# Unable to create a linear or ensemble model to predict FPTS or FPTS_CLASS with a positive R squared value. 
+# Unable to create a linear or ensemble model to predict FPTS or FPTS_CLASS with a positive R squared value.
 
 SEED = 10142024
 
-qb_data_set = fcf.import_model_data('QB')
-
-X = qb_data_set.drop(labels=['PLAYER', 'TEAM', 'OPPONENT', 'POS', 'FPTS', 'WEEK', 'FPTS_CLASS'], axis=1)
-features = X.columns
-y = qb_data_set['FPTS_CLASS']
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=SEED)
-
-# Preprocessing: standardize the data with StandardScaler
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# Trying linear regression, ridge, and lasso models first
-#linreg = LinearRegression()
-#ridge = Ridge(alpha=0.1)
-#lasso = Lasso(alpha=0.1)
-#('LinReg', linreg), ('Ridge', ridge), ('Lasso', lasso)
-# Result: all three models returned R2 values under 0 (around -0.1) and RMSE values around 10.2.
-
-# Trying Gradient Boosting Regressor with hyperparameter tuning
-gbr = GradientBoostingRegressor(n_estimators=400, max_depth=4, loss='absolute_error', min_samples_leaf=4, random_state=SEED)
-#param_grid = {'max_depth': [3, 4, 5], 
-#            'n_estimators': [375, 400, 425], 
-#            'min_samples_leaf': [4], 
-#            'loss': ['absolute_error']}
-#cv = GridSearchCV(estimator=gbr, param_grid=param_grid)
-
-coefficients = {}
-scores = []
-
-model = gbr
-name = 'GBR'
-print('Fitting model...')
-model.fit(X_train_scaled, y_train)
-#print(model.best_params_)
-#print(model.best_score_) # note this is r_squared
-
-y_pred = model.predict(X_test_scaled)
-r_squared = np.round(model.score(X_test_scaled, y_test), 3)
-rmse = np.round(root_mean_squared_error(y_test, y_pred), 3)
-scores = (r_squared, rmse)
-coefficients[name] = list(model.feature_importances_)
-feature_table = pd.DataFrame(coefficients, index=features)
-print(scores)
-print(feature_table)
+# Standard Globals
+weeks = fcf.weeks
+file_path_dict = fcf.file_path_dict
+artifact_version = 1    # Bump when a change to the artifact contents makes older artifacts unreadable
+model_cache = {}    # {(pos, backend): artifact}, filled by load_current_artifact and train_position_model
+id_columns = ['PLAYER', 'TEAM', 'OPPONENT', 'POS', 'FPTS', 'WEEK', 'FPTS_CLASS']
+target = 'FPTS_CLASS'
+cv_scoring = {'R2': 'r2', 'RMSE': 'neg_root_mean_squared_error'}
+gbr_param_grid = {'max_depth': [3, 4, 5],
+                  'n_estimators': [375, 400, 425],
+                  'min_samples_leaf': [4],
+                  'loss': ['absolute_error']}
+hgb_param_grid = {'max_depth': [3, 4, 5],
+                  'learning_rate': [0.05, 0.1],
+                  'min_samples_leaf': [4, 20],
+                  'loss': ['absolute_error']}
+
+# Model data
+def split_features(model_data):
+    '''
+    Splits model data from fcf.import_model_data into the feature columns and the target. Returns tuple.
+
+    Args:
+        model_data (pd.DataFrame): model data
+
+    Returns:
+        tuple: (pd.DataFrame of features, pd.Series of targets)
+    '''
+    global id_columns
+    global target
+    X = model_data.drop(labels=id_columns, axis=1)
+    y = model_data[target]
+    return (X, y)
+def get_walk_forward_folds(model_data, min_train_weeks=2):
+    '''
+    Walk-forward folds over the weeks in model data, each fold trains on the weeks before a test week and tests on that
+    week. Retro features only use earlier weeks, so the rows of every fold are taken from the same model data without
+    leaking the test week. Returns list that can be passed as cv to scikit-learn.
+
+    Args:
+        model_data (pd.DataFrame): model data
+        min_train_weeks (int, optional): number of weeks in the first training set. Default: 2
+
+    Returns:
+        list: [(train positions, test positions)], one fold per test week
+    '''
+    global weeks
+    row_weeks = model_data['WEEK'].astype(str).to_numpy()
+    data_weeks = [week for week in weeks if week in set(row_weeks)]
+    week_order = pd.Series(range(len(data_weeks)), index=data_weeks)[row_weeks].to_numpy()
+
+    folds = []
+    for test_order in range(min_train_weeks, len(data_weeks)):
+        folds.append((np.flatnonzero(week_order < test_order), np.flatnonzero(week_order == test_order)))
+    return folds
+def get_fold_weeks(model_data, folds):
+    '''
+    Returns the test week of each fold from get_walk_forward_folds.
+
+    Args:
+        model_data (pd.DataFrame): model data
+        folds (list): output of get_walk_forward_folds
+
+    Returns:
+        list: test weeks
+    '''
+    return [str(model_data['WEEK'].iloc[test[0]]) for train, test in folds]
+
+# Model evaluation
+def make_estimator(backend='gbr', **params):
+    '''
+    Returns a regression model for FPTS_CLASS. 'gbr' is the exact GradientBoostingRegressor tuned so far. 'hgb' is a 
+    HistGradientBoostingRegressor with matching settings, it bins the features, handles NaN without filling and stops 
+    adding trees once a held out tenth of the training rows stops improving. params overwrite the default settings.
+
+    Args:
+        backend (str, optional): 'gbr' or 'hgb'. Default: 'gbr'
+        **params: estimator parameters to set, like max_depth=3
+
+    Returns:
+        sklearn estimator: regression model
+    '''
+    global SEED
+    if backend == 'gbr':
+        estimator = GradientBoostingRegressor(n_estimators=400, max_depth=4, loss='absolute_error', min_samples_leaf=4, random_state=SEED)
+    elif backend == 'hgb':
+        estimator = HistGradientBoostingRegressor(max_iter=400, max_depth=4, loss='absolute_error', min_samples_leaf=4, 
+                                                  early_stopping=True, random_state=SEED)
+    else:
+        raise ValueError(f"backend must be 'gbr' or 'hgb', not {backend!r}")
+    return estimator.set_params(**params)
+def make_model_pipeline(estimator):
+    '''
+    Chains StandardScaler and an estimator, so the scaler is fit on the training rows of each fold only. Opponent features
+    are NaN when a position has no games against the opponent in the window, those are filled with the training median 
+    for estimators without native NaN handling. Returns Pipeline.
+
+    Args:
+        estimator (sklearn estimator): regression model
+
+    Returns:
+        Pipeline: scaler and model
+    '''
+    steps = [('scaler', StandardScaler()), ('model', estimator)]
+    if not(isinstance(estimator, HistGradientBoostingRegressor)):
+        steps.insert(0, ('imputer', SimpleImputer(strategy='median', keep_empty_features=True)))
+    return Pipeline(steps)
+def evaluate_walk_forward(model_data, estimator, min_train_weeks=2, n_jobs=1):
+    '''
+    Scores an estimator on every walk-forward fold of model data, with the folds fit in parallel. Returns dataframe
+    with one row per test week and the R2, RMSE, fit time and predict time (seconds) of the fold.
+
+    Args:
+        model_data (pd.DataFrame): model data
+        estimator (sklearn estimator): regression model
+        min_train_weeks (int, optional): number of weeks in the first training set. Default: 2
+        n_jobs (int, optional): number of folds fit in parallel, -1 for every CPU. Default: 1
+
+    Returns:
+        pd.DataFrame: scores by test week
+    '''
+    global cv_scoring
+    X, y = split_features(model_data)
+    folds = get_walk_forward_folds(model_data, min_train_weeks)
+    results = cross_validate(make_model_pipeline(estimator), X, y, cv=folds, scoring=cv_scoring, n_jobs=n_jobs)
+    scores = pd.DataFrame({'R2': results['test_R2'], 'RMSE': -results['test_RMSE'], 'FIT_TIME': results['fit_time'], 
+                           'PREDICT_TIME': results['score_time']}, index=pd.Index(get_fold_weeks(model_data, folds), name='TEST_WEEK'))
+    return scores.round(3)
+def search_hyperparameters(model_data, estimator, param_grid, n_iter=False, min_train_weeks=2, n_jobs=-1):
+    '''
+    Searches hyperparameters of an estimator over the walk-forward folds of model data, every configuration and fold
+    is fit in parallel. Searches the full grid, or n_iter random configurations if included. Returns dataframe with
+    one row per configuration and its mean R2, RMSE and fit time (seconds) across folds, best R2 first.
+
+    Args:
+        model_data (pd.DataFrame): model data
+        estimator (sklearn estimator): regression model
+        param_grid (dict): {parameter of estimator: list of values}, like gbr_param_grid
+        n_iter (bool or int, optional): if included, number of random configurations to try. Default: False
+        min_train_weeks (int, optional): number of weeks in the first training set. Default: 2
+        n_jobs (int, optional): number of fits run in parallel, -1 for every CPU. Default: -1
+
+    Returns:
+        pd.DataFrame: scores by configuration
+    '''
+    global SEED
+    global cv_scoring
+    X, y = split_features(model_data)
+    folds = get_walk_forward_folds(model_data, min_train_weeks)
+    pipeline_grid = {'model__' + param: values for param, values in param_grid.items()}
+    if isinstance(n_iter, bool):
+        search = GridSearchCV(make_model_pipeline(estimator), pipeline_grid, scoring=cv_scoring, refit=False, cv=folds, n_jobs=n_jobs)
+    else:
+        search = RandomizedSearchCV(make_model_pipeline(estimator), pipeline_grid, n_iter=n_iter, scoring=cv_scoring, refit=False,
+                                    cv=folds, n_jobs=n_jobs, random_state=SEED)
+    search.fit(X, y)
+
+    results = search.cv_results_
+    scores = pd.DataFrame([{param[len('model__'):]: value for param, value in params.items()} for params in results['params']])
+    scores['R2'] = results['mean_test_R2']
+    scores['RMSE'] = -results['mean_test_RMSE']
+    scores['FIT_TIME'] = results['mean_fit_time']
+    return scores.sort_values(by='R2', ascending=False).reset_index(drop=True).round(3)
+def benchmark_backends(model_data, backends=['gbr', 'hgb'], min_train_weeks=2):
+    '''
+    Compares estimator backends from make_estimator on the walk-forward folds of model data. Folds are fit one at a 
+    time so the timings are comparable. Returns dataframe with one row per backend and its mean R2, RMSE, fit time and 
+    predict time (seconds) across folds, plus its fit time relative to the first backend.
+
+    Args:
+        model_data (pd.DataFrame): model data
+        backends (list, optional): backends to compare. Default: ['gbr', 'hgb']
+        min_train_weeks (int, optional): number of weeks in the first training set. Default: 2
+
+    Returns:
+        pd.DataFrame: scores by backend
+    '''
+    results = {}
+    for backend in backends:
+        scores = evaluate_walk_forward(model_data, make_estimator(backend), min_train_weeks, n_jobs=1)
+        results[backend] = scores.mean()
+    results = pd.DataFrame(results).T
+    results['SPEEDUP'] = results['FIT_TIME'].iloc[0] / results['FIT_TIME']
+    return results.round(3)
+
+
+# Model artifacts
+def get_artifact_path(pos, backend='gbr'):
+    '''
+    Returns the artifact file of a position and backend in file_path_dict['model_artifacts'], creating the directory if needed.
+
+    Args:
+        pos (str): position of the model
+        backend (str, optional): 'gbr' or 'hgb', see make_estimator. Default: 'gbr'
+
+    Returns:
+        str: artifact file path
+    '''
+    global artifact_version
+    artifact_dir = file_path_dict['model_artifacts']
+    os.makedirs(artifact_dir, exist_ok=True)
+    return os.path.join(artifact_dir, f"{pos.replace('/', '')}_{backend}_v{artifact_version}.joblib")
+def train_position_model(pos, backend='gbr', model_data=None, save=True):
+    '''
+    Fits the scaler and model of a position on all of its model data and saves them to a versioned artifact with the 
+    feature list they were fit on. Returns dictionary.
+
+    Args:
+        pos (str): position to train a model for
+        backend (str, optional): 'gbr' or 'hgb', see make_estimator. Default: 'gbr'
+        model_data (pd.DataFrame, optional): output of fcf.import_model_data for pos, imported if not included. Default: None
+        save (bool, optional): write the artifact to file_path_dict['model_artifacts']. Default: True
+
+    Returns:
+        dict: artifact with the fitted pipeline, feature list and what it was trained on
+    '''
+    global artifact_version
+    global model_cache
+
+    if model_data is None:
+        model_data = fcf.import_model_data(pos)
+    X, y = split_features(model_data)
+    pipeline = make_model_pipeline(make_estimator(backend))
+    print(f'Fitting {pos} model...')
+    pipeline.fit(X, y)
+
+    artifact = {'pipeline': pipeline,
+                'features': list(X.columns),
+                'pos': pos,
+                'backend': backend,
+                'artifact_version': artifact_version,
+                'feature_version': fcf.feature_version,
+                'feature_specs': fcf.get_feature_specs(pos),
+                'trained_weeks': sorted(set(model_data['WEEK'].astype(str)), key=weeks.index)}
+    if save:
+        artifact_file = get_artifact_path(pos, backend)
+        # Write to a temporary file first so a failed write never leaves a partial artifact
+        joblib.dump(artifact, artifact_file + '.tmp')
+        os.replace(artifact_file + '.tmp', artifact_file)
+    model_cache[(pos, backend)] = artifact
+    return artifact
+def is_artifact_current(artifact, pos):
+    '''
+    Checks an artifact was fit on the current feature set and every week of model data available.
+
+    Args:
+        artifact (dict): output of train_position_model
+        pos (str): position of the model
+
+    Returns:
+        bool: True if the artifact can be used
+    '''
+    global artifact_version
+    return ((artifact.get('artifact_version') == artifact_version) 
+            and (artifact.get('feature_version') == fcf.feature_version)
+            and (artifact.get('feature_specs') == fcf.get_feature_specs(pos))
+            and (artifact.get('trained_weeks') == weeks[1:]))
+def load_current_artifact(pos, backend='gbr'):
+    '''
+    Returns the artifact of a position from model_cache or its saved file if it is current, loaded on first use and 
+    kept in model_cache. Returns None if there is no current artifact, like after a new week of data is added.
+
+    Args:
+        pos (str): position of the model
+        backend (str, optional): 'gbr' or 'hgb', see make_estimator. Default: 'gbr'
+
+    Returns:
+        dict or None: artifact, see train_position_model
+    '''
+    global model_cache
+    if (pos, backend) in model_cache:
+        return model_cache[(pos, backend)]
+
+    artifact_file = get_artifact_path(pos, backend)
+    if os.path.exists(artifact_file):
+        artifact = joblib.load(artifact_file)
+        if is_artifact_current(artifact, pos):
+            model_cache[(pos, backend)] = artifact
+            return artifact
+    return None
+def load_position_model(pos, backend='gbr', model_data=None):
+    '''
+    Returns the artifact of a position, see load_current_artifact. The model is trained again if there is no current artifact.
+
+    Args:
+        pos (str): position of the model
+        backend (str, optional): 'gbr' or 'hgb', see make_estimator. Default: 'gbr'
+        model_data (pd.DataFrame, optional): output of fcf.import_model_data for pos, used if the model is trained. Default: None
+
+    Returns:
+        dict: artifact, see train_position_model
+    '''
+    artifact = load_current_artifact(pos, backend)
+    if artifact is None:
+        artifact = train_position_model(pos, backend, model_data)
+    return artifact
+def load_position_models(pos_list, backend='gbr'):
+    '''
+    Returns the artifacts of several positions, see load_position_model. The model data of every position without a 
+    current artifact is imported with one fcf.import_all_model_data call before they are trained.
+
+    Args:
+        pos_list (list): positions of the models
+        backend (str, optional): 'gbr' or 'hgb', see make_estimator. Default: 'gbr'
+
+    Returns:
+        dict: {pos: artifact}
+    '''
+    artifacts = {pos: load_current_artifact(pos, backend) for pos in pos_list}
+    missing_positions = [pos for pos, artifact in artifacts.items() if artifact is None]
+    if missing_positions:
+        model_data = fcf.import_all_model_data(missing_positions)
+        for pos in missing_positions:
+            artifacts[pos] = train_position_model(pos, backend, model_data[pos])
+    return artifacts
+def predict_future_weeks(pos_list=False, future_weeks=False, backend='gbr', rostered_only=True):
+    '''
+    Predicts FPTS_CLASS for every player of the positions in pos_list in every future week, with one predict call per 
+    position over all players and weeks. Features are built with fcf.build_future_model_data from the latest valid 
+    weeks. Returns dataframe with the model rows and a PRED_FPTS_CLASS column.
+
+    Args:
+        pos_list (bool or list, optional): positions to predict. Default: False, every position with features
+        future_weeks (bool or list, optional): weeks to predict. Default: False, fdi.future_weeks
+        backend (str, optional): 'gbr' or 'hgb', see make_estimator. Default: 'gbr'
+        rostered_only (bool, optional): only predict players with an FFL owner in the latest valid week. Default: True
+
+    Returns:
+        pd.DataFrame: predictions, one row per player and future week
+    '''
+    if isinstance(pos_list, bool):
+        pos_list = list(fcf.stats_w_opp_dict.keys())
+    artifacts = load_position_models(pos_list, backend)
+
+    player_stats = fdi.import_player_with_util_data('all_valid', file_path_dict)
+    status_index = fdi.import_player_status_index('all_valid', file_path_dict, player_stats)
+    players = False
+    if rostered_only:
+        latest_rows = player_stats[(player_stats['WEEK'] == weeks[-1]) & ~player_stats['OWNER'].isin(['FA', fdi.na_val])]
+        players = latest_rows['PLAYER'].astype(object).unique().tolist()
+
+    predictions = []
+    empty_predictions = []
+    for pos, artifact in artifacts.items():
+        future_data = fcf.build_future_model_data(pos, player_stats, status_index, artifact['feature_specs'], future_weeks, players)
+        if future_data.empty:
+            future_data['PRED_FPTS_CLASS'] = pd.Series(dtype=int)
+            empty_predictions.append(future_data.astype({'PLAYER': object, 'TEAM': object, 'POS': object, 'WEEK': object, 'OPPONENT': object}))
+            continue
+        future_data['PRED_FPTS_CLASS'] = artifact['pipeline'].predict(future_data[artifact['features']])
+        predictions.append(future_data.astype({'PLAYER': object, 'TEAM': object, 'POS': object, 'WEEK': object, 'OPPONENT': object}))
+    if not(predictions):
+        # Nothing to predict, like after the last week of the season, the frame keeps the model columns
+        predictions = empty_predictions
+    predictions = pd.concat(predictions, ignore_index=True)
+    for column in ['PLAYER', 'TEAM', 'POS', 'WEEK', 'OPPONENT']:
+        predictions[column] = predictions[column].astype('category')
+    return predictions
+
+
+if __name__ == '__main__':
+    qb_data_set = fcf.import_model_data('QB')
+
+    X, y = split_features(qb_data_set)
+    features = X.columns
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=SEED)
+
+    # Preprocessing: standardize the data with StandardScaler
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    # Trying linear regression, ridge, and lasso models first
+    #linreg = LinearRegression()
+    #ridge = Ridge(alpha=0.1)
+    #lasso = Lasso(alpha=0.1)
+    #('LinReg', linreg), ('Ridge', ridge), ('Lasso', lasso)
+    # Result: all three models returned R2 values under 0 (around -0.1) and RMSE values around 10.2.
+
+    # Trying Gradient Boosting Regressor with hyperparameter tuning
+    gbr = make_estimator('gbr')
+
+    coefficients = {}
+    scores = []
+
+    model = gbr
+    name = 'GBR'
+    print('Fitting model...')
+    model.fit(X_train_scaled, y_train)
+
+    y_pred = model.predict(X_test_scaled)
+    r_squared = np.round(model.score(X_test_scaled, y_test), 3)
+    rmse = np.round(root_mean_squared_error(y_test, y_pred), 3)
+    scores = (r_squared, rmse)
+    coefficients[name] = list(model.feature_importances_)
+    feature_table = pd.DataFrame(coefficients, index=features)
+    print(scores)
+    print(feature_table)
+
+    # Walk-forward evaluation, train on the weeks before each test week
+    print('Walk-forward evaluation...')
+    print(evaluate_walk_forward(qb_data_set, gbr, n_jobs=-1))
+
+    print('Searching hyperparameters...')
+    start_time = time.time()
+    print(search_hyperparameters(qb_data_set, gbr, gbr_param_grid))
+    print(f'Search time: {time.time() - start_time:.1f}s')
+
+    # Histogram gradient boosting, much faster to fit with comparable errors
+    print('Benchmarking backends...')
+    print(benchmark_backends(qb_data_set))
+    start_time = time.time()
+    print(search_hyperparameters(qb_data_set, make_estimator('hgb'), hgb_param_grid))
+    print(f'Search time: {time.time() - start_time:.1f}s')
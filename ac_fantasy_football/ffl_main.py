@@ -2,6 +2,7 @@ import ffl_data_importing as fdi
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
+from collections import deque
 
 # Global Imports
 teams = fdi.teams
@@ -20,6 +21,7 @@ scoring_rules = {'PAYDS': 0.04, 'PATD': 6, 'INT': -2, 'RUYDS': 0.1, 'RUTD': 6, '
 def_scoring_ranges = {'PA0': 5, 'PA1': 4, 'PA7': 3, 'PA14': 1, 'PA18': 0, 'PA28': -1, 'PA35': -3, 'PA46': -5,
                       'YA100': 5, 'YA199': 3, 'YA299': 2, 'YA349': 0, 'YA399': -1, 'YA449': -3, 'YA499': -5, 'YA549': -6, 'YA550': -7}                 
 playoff_weeks = ['WK15', 'WK16', 'WK17']
+playoff_teams = 6
 flex_positions = ['RB', 'WR', 'TE']
 start_by_pos = {'QB': 1, 'RB': 2, 'WR': 2, 'TE': 1, 'FLEX': 1, 'K': 1, 'D/ST': 1} 
 
@@ -27,6 +29,8 @@ start_by_pos = {'QB': 1, 'RB': 2, 'WR': 2, 'TE': 1, 'FLEX': 1, 'K': 1, 'D/ST': 1
 startpos_colors = { 'QB': 'red', 'RB1': 'darkgreen', 'RB2': 'forestgreen', 'WR1': 'darkblue',
                     'WR2': 'blue', 'TE': 'gold', 'FLEX': 'silver', 'K': 'purple', 'D/ST': 'navy'}
 weight_of_def_factor = 0.4
+weight_of_recent_weeks = 0.5    # Weight of the recent weeks mean against the all weeks mean in player projections
+recent_weeks_span = 3
 nfl_schedule_dict = fdi.import_nfl_schedule_dict(file_path_dict, 'all')
 
 stats = []
@@ -93,7 +97,7 @@ def run_graph_fptsclass_by_team_and_position():
     player_data = fdi.add_OWNER(player_data, file_path_dict, owners_for_manual_correction, pull_mapping_from_df=True)
 
     # Aggregate the data using sum of FPTS and FPTS_CLASS
-    player_totals = player_data.groupby(['PLAYER', 'POS', 'OWNER']).agg({'FPTS': 'sum', 'FPTS_CLASS': 'sum'})
+    player_totals = player_data.groupby(['PLAYER', 'POS', 'OWNER'], observed=True).agg({'FPTS': 'sum', 'FPTS_CLASS': 'sum'})
     player_totals = player_totals.reset_index().sort_values('FPTS_CLASS', ascending=False).reset_index(drop=True)
 
 
@@ -130,71 +134,64 @@ def run_graph_fptsclass_by_team_and_position():
     plt.show()
 
 # Functions for team projections
-def calculate_player_stat_wavg(all_weeks_data, last_three_data, stats):
+def calculate_player_stat_wavg(all_weeks_data, last_three_data, stats, weight_of_recent_weeks=0.5):
     '''
-    Assumes last_three_data is a slice of all_weeks_data. Calculates the mean stat for each player all inputted stats in the two dataframes, then calculates an average
-    of each stat for each player. Formula: (mean(all_weeks) + mean(last_three)) / 2. Returns a dataframe.
+    Assumes last_three_data is a slice of all_weeks_data. Calculates the mean stat for each player all inputted stats in the two dataframes, then calculates a weighted average
+    of each stat for each player. Formula: (1 - weight) * mean(all_weeks) + weight * mean(last_three), the default weight of 0.5 is (mean(all_weeks) + mean(last_three)) / 2.
+    Players or stats without last three weeks data use mean(all_weeks). Returns a dataframe.
     
     Args:
         all_weeks_data (pd.DataFrame): all weeks of player data
-        last_three_data (pd.DataFrame): last three weeks of player data
+        last_three_data (pd.DataFrame): last three weeks of player data, or any recent window of weeks
         stats (list): list of stats to aggregate
+        weight_of_recent_weeks (float, optional): between 0 and 1, weight of mean(last_three). Default: 0.5
         
     Returns:
         pd.DataFrame: agrregated averages of player stats
     '''
-    agg_dict = create_agg_dict(stats, 'mean')
-    
-    all_weeks_aggregate = all_weeks_data.groupby(['PLAYER', 'POS', 'OWNER']).agg(agg_dict)
-    three_weeks_aggregate = last_three_data.groupby(['PLAYER', 'POS', 'OWNER']).agg(agg_dict)
-    player_scores = all_weeks_aggregate.merge(three_weeks_aggregate, on=['PLAYER', 'POS', 'OWNER'], how='outer', suffixes=('_ALL', '_L3'))
-    player_scores = player_scores.fillna(-200)
-    # Naming new columns with plain stat name to match stats global
-    # If _L3 is NaN use only _ALL value
-    
-    for stat in stats:
-        player_scores[stat] = player_scores.apply((lambda row: ((row[stat+'_ALL'] + row[stat+'_L3']) / 2) if row[stat+'_L3'] != -200 else row[stat+'_ALL']), axis=1)
-        player_scores = player_scores.drop([(stat+'_ALL'), (stat+'_L3')], axis=1)
+    assert (weight_of_recent_weeks >= 0) & (weight_of_recent_weeks <= 1)
     
+    all_weeks_aggregate = all_weeks_data.groupby(['PLAYER', 'POS', 'OWNER'], observed=True)[stats].mean()
+    three_weeks_aggregate = last_three_data.groupby(['PLAYER', 'POS', 'OWNER'], observed=True)[stats].mean()
+    three_weeks_aggregate = three_weeks_aggregate.reindex(all_weeks_aggregate.index)
+
+    # If the last three weeks mean is NaN use only the all weeks mean
+    player_scores = (all_weeks_aggregate * (1 - weight_of_recent_weeks)) + (three_weeks_aggregate * weight_of_recent_weeks)
+    player_scores = player_scores.where(three_weeks_aggregate.notna(), all_weeks_aggregate)
     return player_scores
-def calculate_opp_stat_wavg(all_weeks_data, last_three_data, stats):
+def calculate_opp_stat_wavg(all_weeks_data, last_three_data, stats, opp_cube=None):
     '''
     Assumes last_three_data is a slice of all_weeks_data. Calculates the sum stat grouped by position, opponent, and week, then mean across weeks, grouping by position and opponent
     for all inputted stats in the two dataframes. Summarizes by averaging the values in both dataframes. Formula: (mean(all_weeks) + mean(last_three)) / 2. Returns a dataframe.
+    Both means are read from one fdi.OppStatCube of all_weeks_data.
     
     Args:
         all_weeks_data (pd.DataFrame): all weeks of player data
         last_three_data (pd.DataFrame): last three weeks of player data
         stats (list): list of stats to aggregate
+        opp_cube (fdi.OppStatCube, optional): cube of all_weeks_data including stats, without na_val opponents. Built if not included. Default: None
         
     Returns:
         pd.DataFrame: aggregated averages of stats vs. opponent by position
     '''
     global na_val
+    global valid_weeks
 
-    mean_dict = create_agg_dict(stats, 'mean')
-    sum_dict = create_agg_dict(stats, 'sum')
-    
     # Note: bye weeks should be a non-issue here, teams not listed as opponents, does not count against mean
     # Drop any rows without an opponent, there shouldn't be any
-    all_weeks_data = all_weeks_data.drop(all_weeks_data[all_weeks_data['OPPONENT'] == na_val].index)
-    last_three_data = last_three_data.drop(last_three_data[last_three_data['OPPONENT'] == na_val].index)
-
-    # Sum for each opponent, position, week
-    all_weeks_totals = all_weeks_data.groupby(['OPPONENT', 'POS', 'WEEK']).agg(sum_dict)
-    last_three_totals = last_three_data.groupby(['OPPONENT', 'POS', 'WEEK']).agg(sum_dict)
-
-    # Average for each opponent, position
-    all_weeks_average = all_weeks_totals.groupby(['OPPONENT', 'POS']).agg(mean_dict)
-    last_three_average = last_three_totals.groupby(['OPPONENT', 'POS']).agg(mean_dict)
-
-    # Merge the dataframes
-    opponent_scores = all_weeks_average.merge(last_three_average, on=['OPPONENT', 'POS'], how='inner', suffixes=('_ALL', '_L3'))
-
-    # Average all_weeks and last_three, then drop the old columns
-    for stat in stats:
-        opponent_scores[stat] = (opponent_scores[stat+'_ALL'] + opponent_scores[stat+'_L3']) / 2
-        opponent_scores = opponent_scores.drop([(stat+'_ALL'), (stat+'_L3')], axis=1)
+    if opp_cube is None:
+        all_weeks_data = all_weeks_data.drop(all_weeks_data[all_weeks_data['OPPONENT'] == na_val].index)
+        opp_cube = fdi.OppStatCube(all_weeks_data, stats, valid_weeks)
+
+    # Average for each opponent, position across all weeks and the last three weeks
+    all_weeks_average = opp_cube.window_average(0, len(opp_cube.weeks), stats)
+    start, end = opp_cube.week_bounds(last_three_data['WEEK'].unique())
+    last_three_average = opp_cube.window_average(start, end, stats)
+
+    # Average all_weeks and last_three, keeping opponents with data in both
+    both = (opp_cube.window_weeks(0, len(opp_cube.weeks)) > 0) & (opp_cube.window_weeks(start, end) > 0)
+    opponent_scores = opp_cube.to_frame((all_weeks_average + last_three_average) / 2, stats)
+    opponent_scores = opponent_scores[both.reshape(-1)]
     return opponent_scores
 def calculate_def_factor(opp_stats, stats):
     '''
@@ -206,46 +203,13 @@ def calculate_def_factor(opp_stats, stats):
         stats (list): list of stats in opp_stats
         
     Returns:
-        dictionary: {OPPONENT: {POS: {STAT: factor}}}
+        fdi.DefFactorTable: factors by opponent, position and stat, reads like {OPPONENT: {POS: {STAT: factor}}}
     '''
-    global positions
-
-    mean_min_dict = {}
-    for pos in positions:
-        pos_only = opp_stats.loc[opp_stats['POS'] == pos]
-        for stat in stats:
-            mean = pos_only[stat].mean()
-            min = pos_only[stat].min()
-            if stat in mean_min_dict.keys():
-                mean_min_dict[stat][pos] = [mean, min]
-            else:
-                mean_min_dict[stat] = {pos: [mean, min]}
-    # def_factor dict format - {OPPONENT: {POS: {STAT: factor}}}     
-    def_factor_dict = {}
-    for index, row in opp_stats.iterrows():
-        for stat in stats:
-            mean = mean_min_dict[stat][row['POS']][0]
-            min = mean_min_dict[stat][row['POS']][1]
-            
-            if (mean==0):
-                factor = 0
-            else:
-                factor = ((row[stat] - min) / (mean - min)) - 1
-            
-            if row['OPPONENT'] in def_factor_dict.keys():
-                if row['POS'] in def_factor_dict[row['OPPONENT']].keys():
-                    def_factor_dict[row['OPPONENT']][row['POS']][stat] = factor  
-                else:
-                    def_factor_dict[row['OPPONENT']][row['POS']] = {stat: factor}
-            else:
-                def_factor_dict[row['OPPONENT']] = {row['POS']: {stat: factor}}
-
-            
-    return def_factor_dict
+    return fdi.DefFactorTable(opp_stats, stats)
 def process_all_weeks_data(all_weeks_data, debug_mode=False, debug_player=False):
     '''
     Process all_weeks_data, add in any missing player rows, drop players without owner, drop dnp weeks, 
-    fill in entries without opponents, drop any new bye week entries, convert stat columns to floats.
+    fill in entries without opponents, drop any new bye week entries.
     Returns dataframe.
     
     Args:
@@ -272,27 +236,25 @@ def process_all_weeks_data(all_weeks_data, debug_mode=False, debug_player=False)
         print('After add owner: ')
         print(all_weeks_data[all_weeks_data['PLAYER'] == debug_player])
     
-    all_weeks_data = all_weeks_data.drop(all_weeks_data[(all_weeks_data['TEAM'] == 'FA') | (all_weeks_data['BYE'].astype(bool)) | (all_weeks_data['OUT'].astype(bool))].index)
+    all_weeks_data = all_weeks_data.drop(all_weeks_data[(all_weeks_data['TEAM'] == 'FA') | all_weeks_data['BYE'] | all_weeks_data['OUT']].index)
     if debug_mode:
         print('After drop FA/BYE: ')
         print(all_weeks_data[all_weeks_data['PLAYER'] == debug_player])
     
+
     # Fill in entries without opponents, drop any new bye week entries
     all_weeks_data['OPPONENT'] = all_weeks_data.apply(lambda row: nfl_schedule_dict[row['TEAM']][row['WEEK']] if row['OPPONENT'] == 0 else row['OPPONENT'], axis=1)
     all_weeks_data = all_weeks_data.drop(all_weeks_data[all_weeks_data['OPPONENT'] == 'BYE'].index)
-
-    # Convert columns for averages
-    for key in scoring_rules:
-        all_weeks_data[key] = all_weeks_data[key].astype(float)
     return all_weeks_data
 def calculate_player_projections(player_stats, def_factor_dict, weight_of_def_factor, verbose=False):
     '''
     Calculate player projected score each week by projecting stats using the weighted average with a defense factor, then multiplying by scoring rules.
-    Returns a dataframe. 
+    All player weeks are projected at once, the player stats are scaled by the def factors of each week's opponent and 
+    PROJ_FPTS is the product with the scoring rules. Rows are ordered by week, then by player_stats. Returns a dataframe. 
 
     Args:
         player_stats (pd.DataFrame): output of calculate_player_stat_wavg
-        def_factor_dict (dict): output of calculate_def_factor
+        def_factor_dict (fdi.DefFactorTable or dict): output of calculate_def_factor, or {OPPONENT: {POS: {STAT: factor}}}
         wieght_of_def_factor (float): between 0 and 1, influence of opponent defense on player projections
         verbose (bool, optional): set to True for a more verbose output
         
@@ -302,31 +264,44 @@ def calculate_player_projections(player_stats, def_factor_dict, weight_of_def_fa
     '''
     global future_weeks
     global nfl_schedule_dict
+    global positions
+    global stats
+    global scoring_rules
 
-    projections_df = pd.DataFrame(columns=player_stats.columns)
-    proj_df_index = 0
-    for week in future_weeks:
-        if verbose:
-            print('Calculating ',week,'...')
-        for index, row in player_stats.iterrows():
-            # Handle bye weeks by skipping them - no rows for bye week data in projections_df, owners will not start a player on bye
-            opponent = nfl_schedule_dict[row['TEAM']][week]
-            if opponent == 'BYE':
-                continue
-
-            projections_df.loc[proj_df_index, ['PLAYER', 'TEAM', 'POS', 'OWNER', 'WEEK']] = [row['PLAYER'], row['TEAM'], row['POS'], row['OWNER'], week]
-            projections_df.loc[proj_df_index, 'OPPONENT'] = opponent
-    
-            proj_pts_sum = 0
-            for stat in stats:
-                def_factor = def_factor_dict[opponent][row['POS']][stat]
-                player_prev = row[stat]
-                proj_stat = player_prev * (1 + (def_factor * weight_of_def_factor))
-                projections_df.loc[proj_df_index, stat] = proj_stat
-                proj_pts_sum = proj_pts_sum + proj_stat * scoring_rules[stat]
-            
-            projections_df.loc[proj_df_index, 'PROJ_FPTS'] = proj_pts_sum
-            proj_df_index += 1
+    if not(isinstance(def_factor_dict, fdi.DefFactorTable)):
+        def_factor_dict = fdi.DefFactorTable.from_dict(def_factor_dict, stats)
+
+    # Opponent of every player in every future week
+    schedule = pd.DataFrame(nfl_schedule_dict).T.reindex(columns=future_weeks)
+    opponents = schedule.reindex(player_stats['TEAM'].astype(object)).to_numpy()
+    unscheduled = pd.isna(opponents).any(axis=1)
+    if unscheduled.any():
+        raise KeyError(f"No schedule for team {player_stats['TEAM'].astype(object).to_numpy()[unscheduled][0]}")
+
+    # Handle bye weeks by skipping them - no rows for bye week data in projections_df, owners will not start a player on bye
+    week_nums, player_nums = np.nonzero((opponents != 'BYE').T)
+    row_opponents = opponents[player_nums, week_nums]
+    if verbose:
+        print('Calculating ', len(player_nums), ' player weeks...')
+
+    row_positions = player_stats['POS'].astype(object).to_numpy()[player_nums]
+    row_factors = def_factor_dict.lookup(row_opponents, row_positions, stats)
+    missing = np.isnan(row_factors).any(axis=1)
+    if missing.any():
+        raise KeyError(f'No def factor for {row_opponents[missing][0]} against {row_positions[missing][0]}')
+
+    player_prev = player_stats[stats].to_numpy(dtype=float)[player_nums]
+    proj_stats = player_prev * (1 + (row_factors * weight_of_def_factor))
+    scoring = np.array([scoring_rules[stat] for stat in stats])
+
+    columns = list(player_stats.columns) + [column for column in ['WEEK', 'OPPONENT', 'PROJ_FPTS'] if column not in player_stats.columns]
+    projections_df = pd.DataFrame(index=range(len(player_nums)), columns=columns)
+    for column in ['PLAYER', 'TEAM', 'POS', 'OWNER']:
+        projections_df[column] = player_stats[column].iloc[player_nums].reset_index(drop=True)
+    projections_df['WEEK'] = pd.Categorical(np.array(future_weeks)[week_nums], categories=future_weeks)
+    projections_df['OPPONENT'] = pd.Categorical(row_opponents)
+    projections_df[stats] = proj_stats
+    projections_df['PROJ_FPTS'] = proj_stats @ scoring
     return projections_df
 def calculate_weekly_final_scores(projections_df):
     '''
@@ -343,22 +318,22 @@ def calculate_weekly_final_scores(projections_df):
     global start_by_pos
     global flex_positions
 
+    # Lineups of every owner and week in one pass
+    lineup_data = projections_df[projections_df['WEEK'].isin(future_weeks)].copy()
+    lineup_data = fdi.add_STARTER_and_STARTPOS(lineup_data, ['PROJ_FPTS'], start_by_pos=start_by_pos, flex_positions=flex_positions, lineup_by=['OWNER', 'WEEK'])
+    starters_only = lineup_data[lineup_data['STARTER']]
+    sums = starters_only.groupby([starters_only['WEEK'].astype(object), starters_only['OWNER'].astype(object)])['PROJ_FPTS'].sum()
+
     # proj_final_score_dict - {OWNER: {WEEK: {'PTS': PROJ_FPTS}}}
     proj_final_score_dict = {}
     for week in future_weeks:
-        week_data = projections_df.loc[projections_df['WEEK'] == week]
-        week_data = week_data.copy()
-        week_data = fdi.add_STARTER_and_STARTPOS(week_data, ['PROJ_FPTS'], start_by_pos=start_by_pos, flex_positions=flex_positions)
-        
-        starters_only = week_data[week_data['STARTER']]
-
-        sums = starters_only.groupby('OWNER').agg({'PROJ_FPTS': 'sum'})
-        
-        for index, row in sums.iterrows():
-            if index in proj_final_score_dict.keys():
-                proj_final_score_dict[index][week] = {'PTS': row['PROJ_FPTS']}
+        if week not in sums.index:
+            continue
+        for owner, pts in sums[week].items():
+            if owner in proj_final_score_dict.keys():
+                proj_final_score_dict[owner][week] = {'PTS': pts}
             else:
-                proj_final_score_dict[index] = {week: {'PTS': row['PROJ_FPTS']}}
+                proj_final_score_dict[owner] = {week: {'PTS': pts}}
     
     return proj_final_score_dict
 def add_matchup_result_info(proj_final_score_dict):
@@ -440,20 +415,253 @@ def project_final_standings(proj_final_score_dict):
     standings_sorted = standings.sort_values(by=['WINS', 'TIES', 'PTS'], ascending=[False, False, False])
 
     return standings_sorted
-def run_imports_cleaning_and_player_projections(drop_ffl_fa_players=False):
+
+# Functions for standings simulations
+def calculate_player_fpts_sd(all_weeks_data):
+    '''
+    Standard deviation of each player's weekly FPTS across the weeks in all_weeks_data, used as the spread of their projections.
+    Players with fewer than two weeks use the median of their position. Returns a pandas Series indexed by PLAYER.
+    
+    Args:
+        all_weeks_data (pd.DataFrame): output of process_all_weeks_data, weeks players did not play are dropped
+        
+    Returns:
+        pd.Series: FPTS standard deviation by player
     '''
-    Imports all_weeks_data, cleans it, projects player stats and scores in future weeks. Returns projections_df, def_factor_dict
+    player_sd = all_weeks_data.groupby(['PLAYER', 'POS'], observed=True)['FPTS'].std().astype(float)
+    pos_median = player_sd.groupby(level='POS', observed=True).transform('median')
+    player_sd = player_sd.fillna(pos_median).fillna(0).droplevel('POS')
+    player_sd.index = player_sd.index.astype(object)
+    return player_sd[~player_sd.index.duplicated()]
+def get_team_score_distributions(projections_df, weeks, player_fpts_sd):
+    '''
+    Mean and standard deviation of each owner's score in each week, summed across the starters picked by PROJ_FPTS. Player scores are
+    treated as independent normals around PROJ_FPTS with spread from player_fpts_sd, so a team score is normal with the summed mean 
+    and variance. Players without a spread and owners without starters in a week add 0. Returns two dataframes, one row per owner 
+    and one column per week.
+    
+    Args:
+        projections_df (pd.DataFrame): output of calculate_player_projections
+        weeks (list): weeks to return
+        player_fpts_sd (pd.Series): output of calculate_player_fpts_sd
+        
+    Returns:
+        pd.DataFrame: mean team scores
+        pd.DataFrame: team score standard deviations
+    '''
+    global start_by_pos
+    global flex_positions
+
+    lineup_data = projections_df[projections_df['WEEK'].isin(weeks)].copy()
+    lineup_data = fdi.add_STARTER_and_STARTPOS(lineup_data, ['PROJ_FPTS'], start_by_pos=start_by_pos, flex_positions=flex_positions, lineup_by=['OWNER', 'WEEK'])
+    starters_only = lineup_data[lineup_data['STARTER']]
+    keys = [starters_only['OWNER'].astype(object), starters_only['WEEK'].astype(object)]
+
+    score_means = starters_only['PROJ_FPTS'].astype(float).groupby(keys).sum().unstack().reindex(columns=weeks).fillna(0)
+    starter_sds = starters_only['PLAYER'].astype(object).map(player_fpts_sd).fillna(0).astype(float)
+    score_vars = (starter_sds ** 2).groupby(keys).sum().unstack().reindex(columns=weeks).fillna(0)
+    return score_means, np.sqrt(score_vars)
+def simulate_season_batch(score_means, score_sds, matchups_df, standings, n_sims, rng):
+    '''
+    Simulates n_sims seasons at once. Team scores are drawn for every simulation, owner and week as one array and clipped at 0, each 
+    owner is compared with their matchup opponent's score of the same draw and the results are added to the current standings. Seeds 
+    follow project_final_standings, sorting by WINS, TIES then PTS. Returns dictionary of counts that add up across batches.
+    
+    Args:
+        score_means (pd.DataFrame): output of get_team_score_distributions
+        score_sds (pd.DataFrame): output of get_team_score_distributions
+        matchups_df (pd.DataFrame): output of fdi.import_owner_matchups
+        standings (pd.DataFrame): output of fdi.import_current_standings
+        n_sims (int): number of seasons to simulate
+        rng (np.random.Generator): random number generator
+        
+    Returns:
+        dictionary: {'SIMS': n_sims, 'WIN_COUNTS': [owner, wins added], 'SEED_COUNTS': [owner, seed], 'WINS_SUM': [owner], 'PTS_SUM': [owner]}
+    '''
+    owners = list(standings.index)
+    weeks = list(score_means.columns)
+    owner_lookup = {owner: num for num, owner in enumerate(owners)}
+    means = score_means.reindex(owners).fillna(0).to_numpy()
+    sds = score_sds.reindex(owners).fillna(0).to_numpy()
+    opp_nums = matchups_df.loc[owners, weeks].apply(lambda column: column.map(owner_lookup)).to_numpy(dtype=int)
+    week_nums = np.arange(len(weeks))
+
+    # Scores [sim, owner, week] and the matchup opponent's score of the same draw, rounded like add_matchup_result_info
+    # A team score below 0 is not a realistic week, draws are clipped at 0
+    scores = np.round(np.maximum(rng.normal(means, sds, size=(n_sims,) + means.shape), 0), 2)
+    opp_scores = scores[:, opp_nums, week_nums]
+    wins_added = (scores > opp_scores).sum(axis=2)
+    ties_added = (scores == opp_scores).sum(axis=2)
+
+    wins = standings['WINS'].to_numpy() + wins_added
+    ties = standings['TIES'].to_numpy() + ties_added
+    pts = standings['PTS'].to_numpy() + scores.sum(axis=2)
+
+    # Seed of every owner in every simulation, 0 is the first seed
+    order = np.lexsort((-pts, -ties, -wins), axis=-1)
+    seeds = np.empty_like(order)
+    np.put_along_axis(seeds, order, np.broadcast_to(np.arange(len(owners)), order.shape), axis=1)
+
+    owner_nums = np.arange(len(owners))
+    win_counts = np.bincount((owner_nums * (len(weeks)+1) + wins_added).ravel(), minlength=len(owners)*(len(weeks)+1))
+    seed_counts = np.bincount((owner_nums * len(owners) + seeds).ravel(), minlength=len(owners)**2)
+    return {'SIMS': n_sims, 
+            'WIN_COUNTS': win_counts.reshape(len(owners), len(weeks)+1), 
+            'SEED_COUNTS': seed_counts.reshape(len(owners), len(owners)),
+            'WINS_SUM': wins.sum(axis=0),
+            'PTS_SUM': pts.sum(axis=0)}
+def summarize_season_simulations(counts, standings, playoff_teams):
+    '''
+    Turns the counts of simulate_season_batch into odds. Returns a dataframe of each owner's mean wins and points, playoff odds and 
+    the probability of each seed, sorted by playoff odds, and a dataframe of the probability of each final win total.
+    
+    Args:
+        counts (dict): output of simulate_season_batch
+        standings (pd.DataFrame): output of fdi.import_current_standings
+        playoff_teams (int): number of seeds that make the playoffs
+        
+    Returns:
+        pd.DataFrame: simulated standings summary
+        pd.DataFrame: win distribution, one column per final win total
+    '''
+    owners = list(standings.index)
+    n_sims = counts['SIMS']
+    seed_odds = counts['SEED_COUNTS'] / n_sims
+
+    summary = pd.DataFrame({'WINS': counts['WINS_SUM'] / n_sims, 'PTS': counts['PTS_SUM'] / n_sims, 
+                            'PLAYOFF_ODDS': seed_odds[:, :playoff_teams].sum(axis=1)}, index=standings.index)
+    seed_columns = ['SEED' + str(seed+1) for seed in range(len(owners))]
+    summary[seed_columns] = seed_odds
+    summary = summary.sort_values(by=['PLAYOFF_ODDS', 'WINS'], ascending=[False, False]).round(3)
+
+    # Win totals are current wins plus wins added
+    win_odds = counts['WIN_COUNTS'] / n_sims
+    current_wins = standings['WINS'].to_numpy()
+    win_totals = np.arange(current_wins.min(), current_wins.max() + win_odds.shape[1])
+    win_distribution = pd.DataFrame(0.0, index=standings.index, columns=win_totals)
+    for owner_num, owner in enumerate(owners):
+        win_distribution.loc[owner, current_wins[owner_num] + np.arange(win_odds.shape[1])] = win_odds[owner_num]
+    win_distribution = win_distribution.reindex(summary.index).round(3)
+    return summary, win_distribution
+def get_simulation_batch_size(n_owners, n_weeks, memory_budget_mb):
+    '''
+    Number of seasons simulate_season_batch can simulate at once within memory_budget_mb. Returns int, at least 1.
+    
+    Args:
+        n_owners (int): number of owners
+        n_weeks (int): number of weeks simulated
+        memory_budget_mb (float): memory for one batch in megabytes
+        
+    Returns:
+        int: seasons per batch
+    '''
+    # Scores, opponent scores and the two comparisons by owner and week, plus the totals and seeds by owner
+    bytes_per_sim = (n_owners * n_weeks * 8 * 4) + (n_owners * 8 * 6)
+    return max(1, int((memory_budget_mb * 1024**2) // bytes_per_sim))
+def simulate_season_shard(score_means, score_sds, matchups_df, standings, n_sims, seed_sequence):
+    '''
+    Runs simulate_season_batch with a random number generator of its own, for use in a worker process. Returns dictionary.
+    
+    Args:
+        score_means (pd.DataFrame): output of get_team_score_distributions
+        score_sds (pd.DataFrame): output of get_team_score_distributions
+        matchups_df (pd.DataFrame): output of fdi.import_owner_matchups
+        standings (pd.DataFrame): output of fdi.import_current_standings
+        n_sims (int): number of seasons to simulate
+        seed_sequence (np.random.SeedSequence): seed of this shard
+        
+    Returns:
+        dictionary: output of simulate_season_batch
+    '''
+    return simulate_season_batch(score_means, score_sds, matchups_df, standings, n_sims, np.random.default_rng(seed_sequence))
+def merge_simulation_counts(total_counts, counts):
+    '''
+    Adds the counts of one batch from simulate_season_batch to a running total. Returns dictionary.
+    
+    Args:
+        total_counts (dict or None): running total, None before the first batch
+        counts (dict): output of simulate_season_batch
+        
+    Returns:
+        dictionary: total counts
+    '''
+    if total_counts is None:
+        return counts
+    return {key: total_counts[key] + value for key, value in counts.items()}
+def simulate_final_standings(projections_df, all_weeks_data, n_sims=100000, seed=None, workers=1, memory_budget_mb=256):
+    '''
+    Monte Carlo version of project_final_standings. Simulates the remaining regular season weeks n_sims times from the projected team 
+    score distributions and the owner matchups, the spread of each player's score is their weekly FPTS standard deviation in 
+    all_weeks_data. Seasons are simulated in batches sized to memory_budget_mb, each batch with its own seed spawned from seed, and 
+    the counts of each batch are merged in batch order once it is done so memory does not grow with n_sims. With workers > 1 the 
+    batches run in a process pool. Results are identical for the same seed, n_sims and memory_budget_mb, whatever the number of 
+    workers. Returns the outputs of summarize_season_simulations.
+    
+    Args:
+        projections_df (pd.DataFrame): output of calculate_player_projections
+        all_weeks_data (pd.DataFrame): output of process_all_weeks_data the projections were made from
+        n_sims (int, optional): number of seasons to simulate. Default: 100000
+        seed (int, optional): seed for the random number generators, results are reproducible with the same seed. Default: None
+        workers (int, optional): number of processes simulating batches, 1 simulates serially. Default: 1
+        memory_budget_mb (float, optional): memory for one batch in megabytes. Default: 256
+        
+    Returns:
+        pd.DataFrame: simulated standings summary
+        pd.DataFrame: win distribution, one column per final win total
+    '''
+    global future_weeks
+    global playoff_weeks
+    global playoff_teams
+    global file_path_dict
+
+    regular_weeks = [week for week in future_weeks if week not in playoff_weeks]
+    player_fpts_sd = calculate_player_fpts_sd(all_weeks_data)
+    score_means, score_sds = get_team_score_distributions(projections_df, regular_weeks, player_fpts_sd)
+    matchups_df = fdi.import_owner_matchups(file_path_dict)
+    standings = fdi.import_current_standings(file_path_dict)
+
+    batch_size = get_simulation_batch_size(len(standings), len(regular_weeks), memory_budget_mb)
+    batches = [batch_size] * (n_sims // batch_size)
+    if n_sims % batch_size:
+        batches.append(n_sims % batch_size)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(batches))
+    sim_args = (score_means, score_sds, matchups_df, standings)
+
+    counts = None
+    with fdi.get_import_executor(workers) as executor:
+        if executor is None:
+            for batch_sims, seed_sequence in zip(batches, seed_sequences):
+                counts = merge_simulation_counts(counts, simulate_season_shard(*sim_args, batch_sims, seed_sequence))
+        else:
+            # At most two batches per worker are pending, batches are merged and released in batch order so the float sums
+            # add up the same way as the serial loop
+            pending = deque()
+            for batch_sims, seed_sequence in zip(batches, seed_sequences):
+                if len(pending) >= 2 * workers:
+                    counts = merge_simulation_counts(counts, pending.popleft().result())
+                pending.append(executor.submit(simulate_season_shard, *sim_args, batch_sims, seed_sequence))
+            while pending:
+                counts = merge_simulation_counts(counts, pending.popleft().result())
+    return summarize_season_simulations(counts, standings, playoff_teams)
+def run_imports_cleaning_and_player_projections(drop_ffl_fa_players=False, w_all_weeks_data=False):
+    '''
+    Imports all_weeks_data, cleans it, projects player stats and scores in future weeks. Returns projections_df, def_factor_dict,
+    and all_weeks_data if w_all_weeks_data is True
 
     Args:
         drop_ffl_fa_players (bool, optional): if True, players without a listed ffl owner are dropped. 
+        w_all_weeks_data (bool, optional): if True, the processed all_weeks_data is also returned. Default: False
         
     Returns:
         pd.DataFrame: player projections for future weeks
-        dictionary: {OPPONENT: {POS: {STAT: factor}}}
+        fdi.DefFactorTable: factors by opponent, position and stat, reads like {OPPONENT: {POS: {STAT: factor}}}
+        pd.DataFrame: processed all weeks of player data, only if w_all_weeks_data is True
     '''
     global debug_mode
     global valid_weeks
     global weight_of_def_factor
+    global weight_of_recent_weeks
+    global recent_weeks_span
     global stats
     global file_path_dict
     global def_scoring_ranges
@@ -461,8 +669,8 @@ def run_imports_cleaning_and_player_projections(drop_ffl_fa_players=False):
     # -- Initial Imports and Data Cleaning--
     print('Running initial imports...')
     # Imports 
-    player_team_map = fdi.import_nfl_team_pos_mappings(file_path_dict)
     all_weeks_data = fdi.import_full_team_data('all_valid', file_path_dict, def_scoring_ranges)
+    player_team_map = fdi.import_nfl_team_pos_mappings(file_path_dict, all_weeks_data)
 
     if debug_mode:
         print('Before: ')
@@ -476,13 +684,13 @@ def run_imports_cleaning_and_player_projections(drop_ffl_fa_players=False):
         print(all_weeks_data[all_weeks_data['PLAYER'] == debug_player])
 
     # Slice out the last three weeks only
-    last_three_data = all_weeks_data.loc[all_weeks_data['WEEK'].isin(valid_weeks[len(valid_weeks)-3:])]
+    last_three_data = all_weeks_data.loc[all_weeks_data['WEEK'].isin(valid_weeks[len(valid_weeks)-recent_weeks_span:])]
 
     # -- Player Projection Calculations --
     print('Running projection calculations...')
 
     # Return a weighted average dataframe one row per player
-    player_stats = calculate_player_stat_wavg(all_weeks_data, last_three_data, stats)
+    player_stats = calculate_player_stat_wavg(all_weeks_data, last_three_data, stats, weight_of_recent_weeks)
     player_stats = player_stats.reset_index()
 
     if debug_mode:
@@ -504,19 +712,16 @@ def run_imports_cleaning_and_player_projections(drop_ffl_fa_players=False):
     opp_stats = calculate_opp_stat_wavg(all_weeks_data, last_three_data, stats)
     opp_stats = opp_stats.reset_index()
 
-    # Return a dictionary of def_factors formatted {OPPONENT: {POS: {STAT: factor}}}
+    # Return a table of def_factors that reads like {OPPONENT: {POS: {STAT: factor}}}
     def_factor_dict = calculate_def_factor(opp_stats, stats)
 
     # Sanity check on def factors summing to ~ 0
-    for stat in stats:
-        for pos in positions:
-            sum = 0
-            for opponent, value1 in def_factor_dict.items():
-                sum += value1[pos][stat]
-            assert (sum < 0.00001) & (sum > -0.00001)
+    assert def_factor_dict.zero_sum_check().all()
 
     # Project player scores by week in PROJ_FPTS
     projections_df = calculate_player_projections(player_stats, def_factor_dict, weight_of_def_factor, verbose=False)
+    if w_all_weeks_data:
+        return projections_df, def_factor_dict, all_weeks_data
     return projections_df, def_factor_dict
 def run_final_standings_projections():
     '''
@@ -528,7 +733,7 @@ def run_final_standings_projections():
     global stats
     global file_path_dict
 
-    projections_df, def_factor_dict = run_imports_cleaning_and_player_projections(drop_ffl_fa_players=True) 
+    projections_df, def_factor_dict, all_weeks_data = run_imports_cleaning_and_player_projections(drop_ffl_fa_players=True, w_all_weeks_data=True) 
 
     # -- Calculate FFL Matchup Results --
     # Project final scores by team for each week in proj_final_score_dict formatted {OWNER: {WEEK: {'PTS': proj_fpts}}
@@ -543,6 +748,11 @@ def run_final_standings_projections():
 
     #projected_additional = projections_df.groupby(['PLAYER']).agg({'PROJ_FPTS': 'sum'}) 
 
+    # Odds from simulating the rest of the season
+    print('Simulating final standings...')
+    simulated_standings, win_distribution = simulate_final_standings(projections_df, all_weeks_data)
+    print(simulated_standings)
+
     fig, ax = plt.subplots()
     ax.axis('off')
     table = ax.table(cellText=standings.values, colLabels=standings.columns, loc='center')
@@ -669,32 +879,32 @@ def run_current_statistic_leaders():
         ascending_list = []
         for stat in stat_list:
             
-            player_data = player_data.drop(player_data[player_data[stat] == na_val].index)
+            player_data = player_data.dropna(subset=[stat])
             ascending_list.append(False)
             agg_dict[stat] = 'sum'
-            player_data[stat] = player_data[stat].astype(float)
         
         slice = fdi.slice_of_player_data(player_data, team_input=team_list, pos_input=pos_list, opp_input=opponent_list, weeks_input=week_list)
         
-        slice_summary = slice.groupby(['PLAYER', 'POS']).agg(agg_dict)
+        slice_summary = slice.groupby(['PLAYER', 'POS'], observed=True).agg(agg_dict)
         slice_sorted = slice_summary.sort_values(by=stat_list, ascending=ascending_list).reset_index()
-        print(slice_sorted.head(how_many))        
+        print(fdi.format_for_display(slice_sorted.head(how_many)))        
 
 # Driver code:
-done = False
-while not(done):
-    print('Menu: \n1 - Current Statistical Leaders\n2 - FFL Power Rankings Graph \n3 - FFL Final Standings Projections')
-    selection = input('Enter the number of an item in the menu to run: ')
-    if selection == '':
-        done = True
-    elif selection.isdigit() and int(selection) == 1:
-        run_current_statistic_leaders()
-        done = True
-    elif selection.isdigit() and int(selection) == 2:
-        run_graph_fptsclass_by_team_and_position()
-        done = True
-    elif selection.isdigit() and int(selection) == 3:
-        run_final_standings_projections()
-        done = True
-    else:
-        print('Please enter a valid selection.')
+if __name__ == '__main__':
+    done = False
+    while not(done):
+        print('Menu: \n1 - Current Statistical Leaders\n2 - FFL Power Rankings Graph \n3 - FFL Final Standings Projections')
+        selection = input('Enter the number of an item in the menu to run: ')
+        if selection == '':
+            done = True
+        elif selection.isdigit() and int(selection) == 1:
+            run_current_statistic_leaders()
+            done = True
+        elif selection.isdigit() and int(selection) == 2:
+            run_graph_fptsclass_by_team_and_position()
+            done = True
+        elif selection.isdigit() and int(selection) == 3:
+            run_final_standings_projections()
+            done = True
+        else:
+            print('Please enter a valid selection.')
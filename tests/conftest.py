@@ -0,0 +1,23 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# The modules import each other by name, so the package directory goes on the path
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+package_dir = os.path.join(repo_dir, 'ac_fantasy_football')
+sys.path.insert(0, package_dir)
+
+import ffl_data_importing as fdi
+
+# Workbooks are read from the package, stores are written to a temporary directory
+store_dirs = ['season_store', 'feature_store', 'model_artifacts']
+store_root = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, store_root, ignore_errors=True)
+for key, path in fdi.file_path_dict.items():
+    path = path.replace('\\', os.sep)
+    if key in store_dirs:
+        fdi.file_path_dict[key] = os.path.join(store_root, os.path.basename(path))
+    else:
+        fdi.file_path_dict[key] = os.path.join(repo_dir, path)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ffl_create_features as fcf
+import ffl_data_importing as fdi
+
+file_path_dict = fdi.file_path_dict
+
+
+# Reference implementations, row by row versions the vectorized functions have to match
+def add_retro_data_by_row(df_to_add_to, ref_data, stat, w_opp_data, span, type, player_status):
+    '''
+    Retro columns filled one result week and row at a time from filtered subsets of ref_data, weeks listed in player_status
+    are taken out of the player average denominator. span is 'L3' or 'ALL'. Returns dataframe with additional columns.
+    '''
+    ref_data = ref_data.astype({'PLAYER': object, 'POS': object, 'OPPONENT': object, 'WEEK': object, stat: float})
+    for result_week in fcf.weeks[1:]:
+        prev_weeks = fcf.weeks[:fcf.weeks.index(result_week)]
+        if span == 'L3':
+            prev_weeks = prev_weeks[-3:]
+        rel_ref_data = ref_data[ref_data['WEEK'] == result_week]
+        retro_data = ref_data[ref_data['WEEK'].isin(prev_weeks)]
+        retro_status = player_status[player_status['WEEK'].isin(prev_weeks)]
+
+        for index, row in rel_ref_data.iterrows():
+            if row['OPPONENT'] == 'BYE WEEK':
+                continue
+            rel_subset = retro_data[retro_data['PLAYER'] == row['PLAYER']]
+            if type == 'SUM':
+                value = rel_subset[stat].sum()
+            else:
+                denom = len(prev_weeks) - retro_status.loc[retro_status['PLAYER'] == row['PLAYER'], 'WEEK'].nunique()
+                value = (rel_subset[stat].sum() / denom) if denom != 0 else 0
+            df_to_add_to.loc[index, (type+span+'_'+stat)] = np.round(value)
+
+            if w_opp_data:
+                rel_subset = retro_data[(retro_data['POS'] == row['POS']) & (retro_data['OPPONENT'] == row['OPPONENT'])]
+                summary = rel_subset.groupby(by='WEEK')[stat].sum()
+                value = summary.mean() if type == 'AVG' else summary.sum()
+                df_to_add_to.loc[index, ('OPP'+type+span+'_'+stat)] = np.round(value, 2)
+    return df_to_add_to
+
+
+@pytest.fixture(scope='module')
+def player_stats():
+    return fdi.import_player_with_util_data('all_valid', file_path_dict)
+@pytest.fixture(scope='module')
+def player_status():
+    return fdi.import_player_status('all_valid', file_path_dict)
+
+
+# Retro features
+@pytest.mark.parametrize('stat, span, type', [('FPTS', 'L3', 'AVG'), ('REC', 'ALL', 'AVG'), ('FPTS', 'L3', 'SUM')])
+def test_add_retro_data_matches_row_loop(player_stats, player_status, stat, span, type):
+    ref_data = player_stats[player_stats['POS'] == 'TE']
+    model_data = ref_data.loc[(ref_data['WEEK'] != 'WK1'), ['PLAYER', 'TEAM', 'POS', 'WEEK', 'OPPONENT', 'FPTS']]
+    status_index = fdi.import_player_status_index('all_valid', file_path_dict, player_stats)
+
+    expected = add_retro_data_by_row(model_data.copy(), ref_data, stat, False, span, type, player_status)
+    retro = fcf.add_retro_data(model_data.copy(), ref_data, stat, span=span, type=type, status_index=status_index)
+    pd.testing.assert_frame_equal(retro, expected)
+def test_add_retro_features_matches_row_loop(player_stats, player_status):
+    ref_data = player_stats[player_stats['POS'] == 'TE']
+    model_data = ref_data.loc[(ref_data['WEEK'] != 'WK1'), ['PLAYER', 'TEAM', 'POS', 'WEEK', 'OPPONENT', 'FPTS']]
+    status_index = fdi.import_player_status_index('all_valid', file_path_dict, player_stats)
+    feature_specs = [('FPTS', 'L3', 'AVG', True), ('REYDS', 'ALL', 'SUM', True), ('SNAP %', 'L3', 'AVG', False)]
+
+    expected = model_data.copy()
+    for stat, span, type, w_opp_data in feature_specs:
+        expected = add_retro_data_by_row(expected, ref_data, stat, w_opp_data, span, type, player_status)
+    retro = fcf.add_retro_features(model_data.copy(), ref_data, feature_specs, status_index=status_index)
+    pd.testing.assert_frame_equal(retro, expected)
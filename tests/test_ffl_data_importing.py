@@ -0,0 +1,200 @@
+import shutil
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ffl_data_importing as fdi
+
+file_path_dict = fdi.file_path_dict
+players_cols = [0,1,2,3,4,5]
+stats_cols = [7,8,9,10,11,12,13,14,15,16,17,18,19,20,21]
+column_labels = ['C/A', 'PAYDS', 'PATD', 'INT', 'CAR', 'RUYDS', 'RUTD', 'REC', 'REYDS', 'RETD', 'TAR', '2PC', 'FUML', 'MISCTD', 'FPTS']
+
+
+# Reference implementations, row by row versions the vectorized functions have to match
+def parse_player_data_by_row(raw_players):
+    '''
+    Chunk parser that walks raw_players one row at a time with parse_player_chunk. Returns dataframe.
+    '''
+    raw_players = raw_players.copy()
+    proj_label = raw_players.columns[5]
+    raw_players[proj_label] = raw_players[proj_label].fillna(fdi.filler_value).astype(str)
+
+    player_data = []
+    loop_num = 0
+    while loop_num < len(raw_players):
+        # Move past filler and header rows to the row after the next 'proj' header
+        if (raw_players.iloc[loop_num, 5] == fdi.filler_value) | (raw_players.iloc[loop_num, 5] == 'proj'):
+            skip = True
+            while skip:
+                loop_num += 1
+                if loop_num >= len(raw_players):
+                    break
+                elif raw_players.iloc[(loop_num-1), 5] == 'proj':
+                    skip = False
+        if loop_num+2 >= len(raw_players):
+            break
+        player_data.append(list(fdi.parse_player_chunk(raw_players, chunk_start_index=loop_num)))
+        loop_num += 3
+    return pd.DataFrame(player_data, columns=['PLAYER', 'TEAM', 'POS', 'OWNER', 'OPPONENT', 'FINALSCORE', 'PROJ'])
+def decompose_field_goals_by_row(kicker_data):
+    '''
+    Field goal decomposition that splits the 'made/attempted' strings of one row at a time, rows for kickers who did 
+    not play are left missing. Returns dataframe.
+    '''
+    decomposed = pd.DataFrame(np.nan, index=kicker_data.index, columns=['XPTM', 'FG50', 'FG40', 'FG0', 'FGM'])
+    for index, row in kicker_data.iterrows():
+        if row['OUT'] | row['BYE']:
+            continue
+        xptm = (row['XP/XPA'].split('/'))[0]
+        fg50 = (row['FG50+/FGA50+'].split('/'))[0]
+        fg40 = (row['FG49/FGA49'].split('/'))[0]
+        fg0 = int((row['FG/FGA'].split('/'))[0]) - int(fg50) - int(fg40)
+        fgm = int((row['FG/FGA'].split('/'))[1]) - int((row['FG/FGA'].split('/'))[0])
+        decomposed.loc[index] = [int(xptm), int(fg50), int(fg40), fg0, fgm]
+    return decomposed
+
+
+def convert_column_by_value(values):
+    '''
+    Column type conversion done one value at a time: a column becomes float32 if every value other than na_val or missing 
+    converts with float(), missing values become NaN. Other columns are returned as is.
+    '''
+    converted = []
+    for value in values:
+        if (value == fdi.na_val) or pd.isna(value):
+            converted.append(np.nan)
+            continue
+        try:
+            converted.append(float(value))
+        except (TypeError, ValueError):
+            return values
+    return pd.Series(converted, index=values.index, name=values.name, dtype='float32')
+def copy_workbook_with_edit(data_file, new_file, part, old, new):
+    '''
+    Copies the workbook at data_file to new_file with old replaced by new in one of its XML parts.
+    '''
+    with zipfile.ZipFile(data_file) as source, zipfile.ZipFile(new_file, 'w') as target:
+        for info in source.infolist():
+            content = source.read(info.filename)
+            if info.filename == part:
+                assert old in content
+                content = content.replace(old, new)
+            target.writestr(info, content)
+
+
+# Chunk parser
+@pytest.mark.parametrize('file_key', ['player_data_by_week', 'kicker_data_by_week', 'defense_data_by_week'])
+@pytest.mark.parametrize('sheet', ['WK1', fdi.valid_sheet_names[-1]])
+def test_parse_player_data_matches_row_parser(file_key, sheet):
+    data_file = file_path_dict[file_key]
+    expected = parse_player_data_by_row(pd.read_excel(data_file, sheet_name=sheet, usecols=players_cols))
+
+    raw_sheet = fdi.import_sheets_from_file(data_file, [sheet])[sheet]
+    players = fdi.parse_player_data(raw_sheet.iloc[:, players_cols])
+    pd.testing.assert_frame_equal(players, expected)
+def test_parse_player_data_edge_cases():
+    # Injury status suffixes, a III suffix, a name differing on its first character, waivers, away games and a second header run
+    rows = [['Josh AllenJosh Allen', 'AC', 'x', '@MIA', 20.5, '18.2'],
+            ['Josh AllenQ', None, None, None, None, None],
+            ['BufQB', None, None, None, None, None],
+            ['Mike Williams IIIMike Williams III', 'WA (Wed)', 'x', 'kc', 0, '3.1'],
+            ['Mike Williams III', None, None, None, None, None],
+            ['NYJWR', None, None, None, None, None],
+            [None, None, None, None, None, None],
+            ['Header', None, None, None, None, 'proj'],
+            ['Xavier WorthyXavier Worthy', 'mas', 'x', 'DEN', 7.1, '9.4'],
+            ['Aavier WorthyIR', None, None, None, None, None],
+            ['KCWR', None, None, None, None, None],
+            ['Bills D/STBills D/ST', 'cj', 'x', '@NYJ', 4, '7'],
+            ['Bills D/STD', None, None, None, None, None],
+            ['BufD/ST', None, None, None, None, None]]
+    raw_players = pd.DataFrame(rows, columns=['Player', 'Owner', 'Unnamed: 2', 'Opp', 'Score', 'Unnamed: 5'])
+
+    expected = parse_player_data_by_row(raw_players)
+    pd.testing.assert_frame_equal(fdi.parse_player_data(raw_players), expected)
+    assert expected['PLAYER'].tolist() == ['Josh Allen', 'Mike Williams III', 'Aavier WorthyIR', 'Bills D/ST']
+
+# Column types
+def test_player_data_schema_keeps_values():
+    typed = fdi.import_player_data(['WK1', 'WK2'], file_path_dict, use_store=False)
+
+    # Import steps without the schema, stats hold na_val strings for players who did not play
+    weekly_data = fdi.import_weekly_data('player_data_by_week', ['WK1', 'WK2'], file_path_dict, fdi.parse_player_stats_sheet, 
+                                         (players_cols, stats_cols, column_labels), use_store=False)
+    untyped = pd.concat(weekly_data, ignore_index=True)
+    untyped['TEAM'] = fdi.convert_team_ini_to_standard(untyped['TEAM'])
+    untyped['OPPONENT'] = fdi.convert_team_ini_to_standard(untyped['OPPONENT'])
+    untyped = fdi.add_OUT_and_BYE(untyped, stat_to_check='CAR', stat_val_to_check=fdi.na_val)
+    untyped = fdi.add_dnp_players(untyped, ['WK1', 'WK2'], file_path_dict, use_store=False).reset_index(drop=True)
+    assert (untyped['CAR'] == fdi.na_val).any()
+
+    assert typed.columns.tolist() == untyped.columns.tolist()
+    for col in typed.columns:
+        if col in fdi.category_columns:
+            assert isinstance(typed[col].dtype, pd.CategoricalDtype)
+            assert typed[col].astype(object).tolist() == untyped[col].tolist()
+        elif col in fdi.bool_columns:
+            assert typed[col].dtype == bool
+            assert typed[col].tolist() == untyped[col].tolist()
+        else:
+            pd.testing.assert_series_equal(typed[col], convert_column_by_value(untyped[col]))
+def test_format_for_display_round_trip():
+    typed = fdi.import_full_team_data(['WK1'], file_path_dict, use_store=False)
+    display = fdi.format_for_display(typed)
+
+    stats = [col for col in typed.columns if typed[col].dtype == 'float32']
+    assert typed[stats].isna().to_numpy().any()
+    assert (display[stats].astype(object) == fdi.na_val).to_numpy().sum() == typed[stats].isna().to_numpy().sum()
+    pd.testing.assert_frame_equal(fdi.apply_player_data_schema(display), typed)
+
+# Kicker field goals
+def test_kicker_field_goals_match_row_decomposition():
+    kicker_data = fdi.import_kicker_data('all_valid', file_path_dict, use_store=False)
+    expected = decompose_field_goals_by_row(kicker_data)
+    pd.testing.assert_frame_equal(kicker_data[expected.columns].astype(float), expected)
+def test_split_made_attempted_round_trip():
+    made_att = pd.Series(['2/3', '0/0', '--/--', '11/12', '--/--'])
+    dnp = pd.Series([False, False, True, False, True])
+    made, attempted = fdi.split_made_attempted(made_att, dnp)
+
+    assert str(made.dtype) == 'Int64' and str(attempted.dtype) == 'Int64'
+    assert made.isna().tolist() == dnp.tolist()
+    played = ~dnp
+    rejoined = made[played].astype(str) + '/' + attempted[played].astype(str)
+    assert rejoined.tolist() == made_att[played].tolist()
+
+# Season store
+def test_shared_string_edit_reparses_sheet(tmp_path):
+    data_file = str(tmp_path / 'player_data_by_week.xlsx')
+    shutil.copy(file_path_dict['player_data_by_week'], data_file)
+    test_paths = dict(file_path_dict, player_data_by_week=data_file, season_store=str(tmp_path / 'season_store'))
+    before = fdi.import_player_data(['WK1'], test_paths, w_dnp_info=False)
+    fingerprints = fdi.get_sheet_fingerprints(data_file, fdi.valid_sheet_names)
+
+    # Rename an owner, cell text is kept in the shared strings part so the sheet parts stay the same
+    copy_workbook_with_edit(file_path_dict['player_data_by_week'], data_file, 'xl/sharedStrings.xml', b'<t>PUP</t>', b'<t>PUQ</t>')
+    with zipfile.ZipFile(file_path_dict['player_data_by_week']) as source, zipfile.ZipFile(data_file) as edited:
+        assert source.getinfo('xl/worksheets/sheet1.xml').CRC == edited.getinfo('xl/worksheets/sheet1.xml').CRC
+    changed = fdi.get_sheet_fingerprints(data_file, fdi.valid_sheet_names)
+    assert all(changed[sheet] != fingerprints[sheet] for sheet in fdi.valid_sheet_names)
+
+    after = fdi.import_player_data(['WK1'], test_paths, w_dnp_info=False)
+    assert (before['OWNER'] == 'PUP').sum() > 0
+    assert (after['OWNER'] == 'PUQ').sum() == (before['OWNER'] == 'PUP').sum()
+    assert not (after['OWNER'] == 'PUP').any()
+def test_store_partition_round_trip(tmp_path):
+    data = pd.DataFrame({'PLAYER': ['Josh Allen', 'Bills D/ST', 'Jake Moody'],
+                         'CAR': [4, fdi.na_val, 0],
+                         'FINALSCORE': ['W 37-20', 1.5, fdi.na_val],
+                         'FLAG': [True, False, 'x'],
+                         'FPTS': [20.5, 7.0, np.nan],
+                         'WEEK': ['WK1', 'WK1', 'WK1']})
+    assert fdi.write_store_partition(str(tmp_path), 'player_data_by_week', 'WK1', data)
+    stored = fdi.read_store_partitions(str(tmp_path), 'player_data_by_week', ['WK1'])['WK1']
+
+    pd.testing.assert_frame_equal(stored, data)
+    for col in ['CAR', 'FINALSCORE', 'FLAG']:
+        assert [type(value) for value in stored[col]] == [type(value) for value in data[col]]
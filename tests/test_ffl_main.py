@@ -0,0 +1,204 @@
+import pandas as pd
+import pytest
+
+import ffl_data_importing as fdi
+import ffl_main as fm
+
+file_path_dict = fdi.file_path_dict
+
+
+# Reference implementations, groupby versions the array backed functions have to match
+def calculate_opp_stat_wavg_by_group(all_weeks_data, last_three_data, stats):
+    '''
+    Opponent averages from groupby sums by opponent, position and week, (mean(all_weeks) + mean(last_three)) / 2 for 
+    opponents with data in both. Returns dataframe indexed by (OPPONENT, POS).
+    '''
+    types = dict({'OPPONENT': object, 'POS': object, 'WEEK': object}, **{stat: float for stat in stats})
+    all_weeks_data = all_weeks_data[all_weeks_data['OPPONENT'] != fdi.na_val].astype(types)
+    last_three_data = last_three_data[last_three_data['OPPONENT'] != fdi.na_val].astype(types)
+
+    all_weeks_average = all_weeks_data.groupby(['OPPONENT', 'POS', 'WEEK'])[stats].sum().groupby(['OPPONENT', 'POS']).mean()
+    last_three_average = last_three_data.groupby(['OPPONENT', 'POS', 'WEEK'])[stats].sum().groupby(['OPPONENT', 'POS']).mean()
+    opponent_scores = all_weeks_average.merge(last_three_average, on=['OPPONENT', 'POS'], how='inner', suffixes=('_ALL', '_L3'))
+    for stat in stats:
+        opponent_scores[stat] = (opponent_scores[stat+'_ALL'] + opponent_scores[stat+'_L3']) / 2
+        opponent_scores = opponent_scores.drop([(stat+'_ALL'), (stat+'_L3')], axis=1)
+    return opponent_scores
+
+def calculate_def_factor_by_row(opp_stats, stats):
+    '''
+    Defense factors filled into {OPPONENT: {POS: {STAT: factor}}} one row of opp_stats at a time, 0 where the position 
+    mean is 0. Returns dictionary.
+    '''
+    mean_min_dict = {}
+    for pos in fm.positions:
+        pos_only = opp_stats.loc[opp_stats['POS'] == pos]
+        mean_min_dict[pos] = {stat: (pos_only[stat].mean(), pos_only[stat].min()) for stat in stats}
+    def_factor_dict = {}
+    for index, row in opp_stats.iterrows():
+        for stat in stats:
+            mean, min = mean_min_dict[row['POS']][stat]
+            factor = 0 if mean == 0 else ((row[stat] - min) / (mean - min)) - 1
+            def_factor_dict.setdefault(row['OPPONENT'], {}).setdefault(row['POS'], {})[stat] = factor
+    return def_factor_dict
+def flatten_def_factors(def_factor_dict):
+    '''
+    Flattens {OPPONENT: {POS: {STAT: factor}}} to a float series indexed by (OPPONENT, POS, STAT). Returns series.
+    '''
+    factors = {(opponent, pos, stat): factor for opponent, pos_factors in def_factor_dict.items() 
+               for pos, stat_factors in pos_factors.items() for stat, factor in stat_factors.items()}
+    return pd.Series(factors, dtype=float).sort_index()
+def calculate_player_projections_by_row(player_stats, def_factor_dict, weight_of_def_factor):
+    '''
+    Projections filled one future week and player at a time from the schedule and def_factor_dict, players on bye are 
+    skipped. Returns dataframe.
+    '''
+    projections = []
+    for week in fm.future_weeks:
+        for index, row in player_stats.iterrows():
+            opponent = fm.nfl_schedule_dict[row['TEAM']][week]
+            if opponent == 'BYE':
+                continue
+            projection = {'PLAYER': row['PLAYER'], 'TEAM': row['TEAM'], 'POS': row['POS'], 'OWNER': row['OWNER'], 'WEEK': week, 'OPPONENT': opponent}
+            proj_pts_sum = 0
+            for stat in fm.stats:
+                proj_stat = float(row[stat]) * (1 + (def_factor_dict[opponent][row['POS']][stat] * weight_of_def_factor))
+                projection[stat] = proj_stat
+                proj_pts_sum = proj_pts_sum + proj_stat * fm.scoring_rules[stat]
+            projection['PROJ_FPTS'] = proj_pts_sum
+            projections.append(projection)
+    return pd.DataFrame(projections, columns=list(player_stats.columns) + ['WEEK', 'OPPONENT', 'PROJ_FPTS'])
+def add_STARTER_and_STARTPOS_by_row(data, value_cols, start_by_pos, flex_positions):
+    '''
+    Lineups filled one owner and position at a time from data with one row per player, players with an na_val owner 
+    are skipped. FLEX goes to the best flex_positions players not already starting. Returns dataframe with additional columns.
+    '''
+    data['STARTER'] = False
+    data['STARTPOS'] = fdi.na_val
+    for owner in data['OWNER'].unique():
+        if owner == fdi.na_val:
+            continue
+        for pos, value in start_by_pos.items():
+            if pos == 'FLEX':
+                pos_subset = data[data['POS'].isin(flex_positions) & ~data['STARTER'] & (data['OWNER'] == owner)]
+            else:
+                pos_subset = data[(data['POS'] == pos) & (data['OWNER'] == owner)]
+                if len(pos_subset) < value:
+                    continue
+            pos_subset_sorted = pos_subset.sort_values(by=value_cols, ascending=False)
+            for i, index in enumerate(pos_subset_sorted.index[:value]):
+                data.loc[index, 'STARTER'] = True
+                data.loc[index, 'STARTPOS'] = pos + str(i+1) if (value > 1) else pos
+    return data
+
+
+@pytest.fixture(scope='module')
+def all_weeks_data():
+    all_weeks_data = fdi.import_full_team_data('all_valid', file_path_dict, fm.def_scoring_ranges)
+    # Manual owner corrections ask for input, owners don't matter to these tests
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(fm, 'owners_for_manual_correction', False)
+        return fm.process_all_weeks_data(all_weeks_data)
+@pytest.fixture(scope='module')
+def last_three_data(all_weeks_data):
+    return all_weeks_data.loc[all_weeks_data['WEEK'].isin(fm.valid_weeks[len(fm.valid_weeks)-fm.recent_weeks_span:])]
+@pytest.fixture(scope='module')
+def opp_stats(all_weeks_data, last_three_data):
+    return fm.calculate_opp_stat_wavg(all_weeks_data, last_three_data, fm.stats).reset_index()
+@pytest.fixture(scope='module')
+def player_stats(all_weeks_data, last_three_data):
+    # Rostered players with their most recent team, like run_imports_cleaning_and_player_projections
+    player_stats = fm.calculate_player_stat_wavg(all_weeks_data, last_three_data, fm.stats, fm.weight_of_recent_weeks).reset_index()
+    player_stats = player_stats[~player_stats['OWNER'].isin(['FA', 0])].reset_index(drop=True)
+    player_team_map = fdi.import_nfl_team_pos_mappings(file_path_dict, all_weeks_data)
+    player_stats['TEAM'] = player_stats['PLAYER'].astype(object).map(lambda player: player_team_map[player][0])
+    return player_stats
+@pytest.fixture(scope='module')
+def projections_df(player_stats, opp_stats):
+    return fm.calculate_player_projections(player_stats, fm.calculate_def_factor(opp_stats, fm.stats), fm.weight_of_def_factor)
+@pytest.fixture(scope='module')
+def league_projections_df(projections_df):
+    # Manual owner corrections are skipped, the players of owners with the same initials are split between them instead
+    projections_df = projections_df.astype({'OWNER': object})
+    for old_name, owners in fm.owners_for_manual_correction.items():
+        players = projections_df.loc[projections_df['OWNER'] == old_name, 'PLAYER'].unique()
+        for num, owner in enumerate(owners):
+            projections_df.loc[projections_df['PLAYER'].isin(players[num::len(owners)]), 'OWNER'] = owner
+    return projections_df
+
+
+# Opponent stats
+def test_opp_stat_wavg_matches_groupby(all_weeks_data, last_three_data):
+    expected = calculate_opp_stat_wavg_by_group(all_weeks_data, last_three_data, fm.stats)
+    opp_stats = fm.calculate_opp_stat_wavg(all_weeks_data, last_three_data, fm.stats)
+    pd.testing.assert_frame_equal(opp_stats, expected)
+
+# Defense factors
+def test_def_factor_table_matches_dict(opp_stats):
+    expected = calculate_def_factor_by_row(opp_stats, fm.stats)
+    def_factor_table = fm.calculate_def_factor(opp_stats, fm.stats)
+
+    assert list(def_factor_table) == list(expected)
+    pd.testing.assert_series_equal(flatten_def_factors(def_factor_table), flatten_def_factors(expected))
+    assert def_factor_table.zero_sum_check().all()
+
+    lookup = def_factor_table.lookup(opp_stats['OPPONENT'], opp_stats['POS'])
+    expected_rows = [[expected[opponent][pos][stat] for stat in fm.stats] for opponent, pos in zip(opp_stats['OPPONENT'], opp_stats['POS'])]
+    pd.testing.assert_frame_equal(pd.DataFrame(lookup, columns=fm.stats), pd.DataFrame(expected_rows, columns=fm.stats, dtype=float))
+
+# Player projections
+def test_player_projections_match_row_loop(player_stats, opp_stats):
+    def_factor_dict = calculate_def_factor_by_row(opp_stats, fm.stats)
+    expected = calculate_player_projections_by_row(player_stats, def_factor_dict, fm.weight_of_def_factor)
+    projections_df = fm.calculate_player_projections(player_stats, fm.calculate_def_factor(opp_stats, fm.stats), fm.weight_of_def_factor)
+
+    assert len(projections_df) > 0
+    id_columns = ['PLAYER', 'TEAM', 'POS', 'OWNER', 'WEEK', 'OPPONENT']
+    pd.testing.assert_frame_equal(projections_df.astype({column: object for column in id_columns}), 
+                                  expected.astype({column: object for column in id_columns}), check_dtype=False)
+def test_player_projections_unscheduled_team(player_stats, opp_stats):
+    player_stats = player_stats.copy()
+    player_stats.loc[0, 'TEAM'] = 'JAX'
+    with pytest.raises(KeyError, match='JAX'):
+        fm.calculate_player_projections(player_stats, fm.calculate_def_factor(opp_stats, fm.stats), fm.weight_of_def_factor)
+
+# Lineups
+def test_lineups_match_row_loop(projections_df):
+    lineup_data = projections_df.astype({'PLAYER': object, 'POS': object, 'OWNER': object, 'WEEK': object})
+    # A few players without an owner stay out of every lineup
+    lineup_data.loc[lineup_data['PLAYER'].isin(lineup_data['PLAYER'].unique()[:5]), 'OWNER'] = fdi.na_val
+    expected = pd.concat([add_STARTER_and_STARTPOS_by_row(week_data.copy(), ['PROJ_FPTS'], fm.start_by_pos, fm.flex_positions) 
+                          for week, week_data in lineup_data.groupby('WEEK', sort=False)])
+    expected = expected.loc[lineup_data.index]
+    assert expected['STARTER'].any()
+
+    lineups = fdi.add_STARTER_and_STARTPOS(lineup_data.copy(), ['PROJ_FPTS'], start_by_pos=fm.start_by_pos, flex_positions=fm.flex_positions, 
+                                           lineup_by=['OWNER', 'WEEK'])
+    pd.testing.assert_frame_equal(lineups, expected)
+
+    # Weekly final scores sum the same starters
+    starters = expected[expected['STARTER']]
+    expected_pts = starters.groupby(['OWNER', 'WEEK'])['PROJ_FPTS'].sum()
+    proj_final_score_dict = fm.calculate_weekly_final_scores(lineup_data)
+    pts = pd.Series({(owner, week): score['PTS'] for owner, week_scores in proj_final_score_dict.items() for week, score in week_scores.items()})
+    pd.testing.assert_series_equal(pts.sort_index(), expected_pts.sort_index(), check_names=False, check_index_type=False)
+
+# Standings simulations
+def test_zero_spread_simulation_matches_projected_standings(league_projections_df, all_weeks_data, monkeypatch):
+    # Players without a spread score their projection in every simulated season
+    monkeypatch.setattr(fm, 'calculate_player_fpts_sd', lambda all_weeks_data: pd.Series(dtype=float))
+    summary, win_distribution = fm.simulate_final_standings(league_projections_df, all_weeks_data, n_sims=50, seed=1)
+    standings = fm.project_final_standings(fm.add_matchup_result_info(fm.calculate_weekly_final_scores(league_projections_df)))
+
+    pd.testing.assert_series_equal(summary['WINS'].reindex(standings.index), standings['WINS'].astype(float), check_names=False)
+    seed_columns = ['SEED' + str(seed+1) for seed in range(len(standings))]
+    assert (summary[seed_columns].to_numpy() == 1).sum(axis=1).tolist() == [1] * len(standings)
+    assert summary[seed_columns].idxmax(axis=1).reindex(standings.index).tolist() == seed_columns
+def test_simulation_same_for_any_workers(league_projections_df, all_weeks_data):
+    # A small memory budget splits the seasons into several batches
+    regular_weeks = [week for week in fm.future_weeks if week not in fm.playoff_weeks]
+    assert fm.get_simulation_batch_size(len(fdi.import_current_standings(file_path_dict)), len(regular_weeks), 0.05) * 4 < 2000
+    serial = fm.simulate_final_standings(league_projections_df, all_weeks_data, n_sims=2000, seed=3, memory_budget_mb=0.05)
+    parallel = fm.simulate_final_standings(league_projections_df, all_weeks_data, n_sims=2000, seed=3, workers=2, memory_budget_mb=0.05)
+    pd.testing.assert_frame_equal(parallel[0], serial[0])
+    pd.testing.assert_frame_equal(parallel[1], serial[1])